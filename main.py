@@ -1,17 +1,16 @@
 import typer
+import ast
 import os
 import time
+from typing import List
 from dotenv import load_dotenv
 from rich.console import Console
-from src.core.llm import LLMProvider
-from src.core.engine import EvolutionEngine
+# Tasks are imported on demand from the registry manifest; the engine, LLM and evaluation
+# modules inside the commands that need them, so `list-tasks` and `worker` start quickly
 from src.tasks.registry import get_task, list_tasks as registry_list_tasks
-# Tasks must be imported to register
-import src.tasks.sorting
-import src.tasks.sudoku
-import src.tasks.primes
-import src.tasks.compression
 from src.utils.storage import save_result
+from src.utils.runlog import RunLog
+from src.utils.results_db import DEFAULT_RESULTS_DB, ResultsDB
 
 load_dotenv()
 app = typer.Typer()
@@ -20,47 +19,383 @@ console = Console()
 @app.command()
 def run(
     task_name: str = typer.Argument(..., help="Name of the task to run"),
+    task_opt: List[str] = typer.Option(None, "--task-opt", help="Task option as key=value, repeatable "
+                                       "(e.g. --task-opt mode=benchmark for compression)"),
     generations: int = typer.Option(3, help="Number of generations to evolve"),
     population: int = typer.Option(5, help="Population size"),
-    model: str = typer.Option("ollama/gemma3:4b", help="LLM model to use")
+    model: str = typer.Option("ollama/gemma3:4b", help="LLM model to use"),
+    concurrency: int = typer.Option(4, help="Max number of LLM requests in flight at once"),
+    evaluator: str = typer.Option("inline", help="Evaluation backend: 'inline', 'process' (sandboxed worker processes) "
+                                  "or 'queue' (separate `main.py worker` processes)"),
+    eval_workers: int = typer.Option(None, help="Parallel evaluation processes (default: CPU count; "
+                                     "for 'queue', the expected number of workers)"),
+    queue_path: str = typer.Option(None, help="SQLite job queue shared with `main.py worker` on this host "
+                                   "(local disk; default: .cache/jobs.sqlite)"),
+    eval_timeout: float = typer.Option(None, help="Wall-clock limit per evaluation in seconds (default: calibrated "
+                                       "per task, 10x its reference solution's time per stage)"),
+    memory_limit: int = typer.Option(1024, help="Address-space limit per evaluation process in MB"),
+    cache: bool = typer.Option(True, help="Reuse fitness of programs that only differ in formatting/comments"),
+    remeasure: bool = typer.Option(False, help="Re-measure cached programs for timing-based tasks (e.g. primes)"),
+    temperature: float = typer.Option(None, help="Sampling temperature"),
+    llm_cache: str = typer.Option(None, help="Path to an on-disk LLM response cache (SQLite) to read/write"),
+    llm_cache_size: int = typer.Option(10000, help="Max number of cached responses (LRU eviction)"),
+    replay: bool = typer.Option(False, help="Serve LLM responses only from --llm-cache, never call the model"),
+    islands: int = typer.Option(1, help="Number of sub-populations evolved in parallel processes"),
+    migration_interval: int = typer.Option(2, help="Generations between migrations (island mode)"),
+    migration_size: int = typer.Option(1, help="Top individuals sent to each neighbour per migration"),
+    topology: str = typer.Option("ring", help="Migration topology: 'ring' or 'full'"),
+    selection: str = typer.Option("rank", help="Parent selection: 'rank', 'map-elites' (program database) or "
+                                   "'nsga2' (Pareto selection over fitness, runtime, peak memory and code length)"),
+    inspirations: int = typer.Option(2, help="Archive programs shown in each mutation prompt (map-elites)"),
+    mutation: str = typer.Option("full", help="Mutation mode: 'full' rewrite or 'diff' (SEARCH/REPLACE edits)"),
+    children_per_call: int = typer.Option(1, help="Children requested per LLM call (the 'n' parameter where "
+                                          "supported, otherwise delimited programs in one completion)"),
+    dedup_threshold: float = typer.Option(None, help="Flag children at least this similar (0-1, MinHash over AST "
+                                          "shingles) to an already evaluated program"),
+    dedup_policy: str = typer.Option("skip", help="What to do with near-duplicates: 'skip', 'reuse' (the duplicated "
+                                     "program's fitness) or 'reprompt' (ask the LLM once more)"),
+    mode: str = typer.Option("generational", help="'generational' or 'steady-state' (pipelined generation/evaluation)"),
+    max_children: int = typer.Option(None, help="Children to evaluate in steady-state mode (default: generations x population)"),
+    queue_size: int = typer.Option(None, help="Bounded queue between generation and evaluation (default: 2 x concurrency)"),
+    profile: bool = typer.Option(False, help="Profile the engine process with cProfile (writes <run_dir>/engine.prof)"),
+    rpm: float = typer.Option(None, help="Max LLM requests per minute"),
+    tpm: float = typer.Option(None, help="Max LLM tokens per minute"),
+    max_requests: int = typer.Option(None, help="Total LLM request budget; the run stops cleanly when spent (per island)"),
+    max_tokens: int = typer.Option(None, help="Total LLM token budget; the run stops cleanly when spent (per island)"),
+    adaptive: bool = typer.Option(False, help="Adapt LLM concurrency (up to --concurrency) to observed latency and errors"),
+    warm_start: int = typer.Option(0, help="Seed the population with the N best programs stored for this task "
+                                   "by earlier runs (see `results`)"),
+    results_db: str = typer.Option(DEFAULT_RESULTS_DB, help="Cross-run results database the run is recorded in")
 ):
     """
     Run the AlphaEvolve agent on a specific task.
     """
+    options = dict(locals())
+    # Create unique run dir in results/
+    run_dir = f"results/{task_name}_{time.strftime('%Y%m%d_%H%M%S')}"
+    _execute(options, run_dir)
+
+@app.command()
+def resume(run_dir: str = typer.Argument(..., help="Run directory of an interrupted run (e.g. results/sorting_...)")):
+    """
+    Resume an interrupted run from its run log and checkpoint.
+    """
+    run_log = RunLog(run_dir)
+    if not run_log.config_path.exists():
+        console.print(f"[red]No run config found in {run_dir}[/red]")
+        raise typer.Exit(code=1)
+    _execute(run_log.load_config(), run_dir, resume=True)
+
+def _execute(options: dict, run_dir: str, resume: bool = False):
+    """Build the task, LLM, evaluator and engine from run options, then evolve and save."""
+    from src.core.llm import create_provider
+    from src.core.response_cache import ResponseCache
+    from src.core.engine import EvolutionEngine
+    from src.core.evaluator import create_evaluator
+    from src.core.islands import IslandConfig, IslandRunner
+    o = options
+
     # 1. Select Task
-    task = get_task(task_name)
+    try:
+        task_options = _parse_task_options(o.get("task_opt"))
+        task = get_task(o["task_name"], **task_options)
+    except (TypeError, ValueError, OSError) as e:
+        console.print(f"[red]Invalid task options for {o['task_name']}: {e}[/red]")
+        raise typer.Exit(code=1)
     
     if not task:
-        console.print(f"[red]Unknown task: {task_name}[/red]")
+        console.print(f"[red]Unknown task: {o['task_name']}[/red]")
         console.print(f"Available tasks: {', '.join(registry_list_tasks())}")
         raise typer.Exit(code=1)
 
     # 2. Setup LLM
+    scheduler_options = dict(requests_per_minute=o.get("rpm"), tokens_per_minute=o.get("tpm"),
+                             max_requests=o.get("max_requests"), max_tokens=o.get("max_tokens"),
+                             adaptive=o.get("adaptive", False), max_concurrency=o["concurrency"])
+    cache_path = (o["llm_cache"] or ".cache/llm_responses.sqlite") if (o["llm_cache"] or o["replay"]) else None
     try:
-        llm = LLMProvider(model_name=model)
+        response_cache = None
+        if cache_path:
+            response_cache = ResponseCache(cache_path, max_entries=o["llm_cache_size"])
+        llm = create_provider(o["model"], task=task, temperature=o["temperature"], cache=response_cache,
+                              replay=o["replay"], **scheduler_options)
     except Exception as e:
         console.print(f"[red]Failed to initialize LLM: {e}[/red]")
         raise typer.Exit(code=1)
 
+    evaluator_options = dict(kind=o["evaluator"], timeout=o["eval_timeout"], workers=o["eval_workers"],
+                             memory_limit_mb=o["memory_limit"], track_memory=o["selection"] == "nsga2")
+    if o["evaluator"] == "queue":
+        evaluator_options.update(queue_path=o.get("queue_path"), task_name=o["task_name"], task_options=task_options)
+    try:
+        evaluation_backend = create_evaluator(**evaluator_options)
+    except ValueError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(code=1)
+
     # 3. Initialize Engine
-    # Create unique run dir in results/
-    run_dir = f"results/{task_name}_{time.strftime('%Y%m%d_%H%M%S')}"
-    engine = EvolutionEngine(llm=llm, task=task, population_size=population, log_dir=run_dir)
+    engine_options = dict(concurrency=o["concurrency"], fitness_cache=o["cache"], remeasure_timed=o["remeasure"],
+                          selection=o["selection"], num_inspirations=o["inspirations"],
+                          mutation_mode=o.get("mutation", "full"), children_per_call=o.get("children_per_call", 1),
+                          dedup_threshold=o.get("dedup_threshold"), dedup_policy=o.get("dedup_policy", "skip"))
+
+    if o["islands"] > 1:
+        if resume:
+            console.print("[red]Resuming island runs is not supported.[/red]")
+            raise typer.Exit(code=1)
+        config = IslandConfig(
+            task=task, model=o["model"], population_size=o["population"], generations=o["generations"],
+            log_dir=run_dir, migration_interval=o["migration_interval"], migration_size=o["migration_size"],
+            topology=o["topology"],
+            llm_options=dict(temperature=o["temperature"], replay=o["replay"], cache_size=o["llm_cache_size"],
+                             cache_path=cache_path, **scheduler_options),
+            evaluator_options=evaluator_options,
+            engine_options=engine_options
+        )
+        try:
+            runner = IslandRunner(config, num_islands=o["islands"])
+        except ValueError as e:
+            console.print(f"[red]{e}[/red]")
+            raise typer.Exit(code=1)
+
+        # 4. Evolve
+        console.print(f"[bold]Starting island evolution for {task.name} "
+                      f"({o['islands']} islands, {o['topology']} topology)...[/bold]")
+        console.print(f"[dim]Output directory: {run_dir}[/dim]")
+        if o.get("warm_start"):
+            console.print("[yellow]--warm-start is not supported in island mode; seeding from scratch.[/yellow]")
+        best_ind = runner.run()
+        population = []
+    else:
+        run_log = RunLog(run_dir)
+        if not resume:
+            run_log.save_config(options)
+        try:
+            engine = EvolutionEngine(llm=llm, task=task, population_size=o["population"], log_dir=run_dir,
+                                     evaluator=evaluation_backend, run_log=run_log, **engine_options)
+        except ValueError as e:
+            console.print(f"[red]{e}[/red]")
+            raise typer.Exit(code=1)
 
-    # 4. Evolve
-    console.print(f"[bold]Starting evolution for {task.name}...[/bold]")
-    console.print(f"[dim]Output directory: {run_dir}[/dim]")
-    best_ind = engine.run(generations=generations)
+        if o.get("warm_start") and not resume:
+            engine.population = ResultsDB(o.get("results_db") or DEFAULT_RESULTS_DB).warm_start(
+                o["task_name"], min(o["warm_start"], o["population"]), task_options=task_options)
+            console.print(f"[dim]Warm start: {len(engine.population)} stored program(s) for "
+                          f"{o['task_name']}[/dim]")
+
+        if o.get("mode", "generational") == "steady-state":
+            if resume:
+                console.print("[red]Resuming steady-state runs is not supported.[/red]")
+                raise typer.Exit(code=1)
+            console.print(f"[bold]Starting steady-state evolution for {task.name}...[/bold]")
+            console.print(f"[dim]Output directory: {run_dir}[/dim]")
+            best_ind = _profiled(o.get("profile", False), run_dir, lambda: engine.run_steady_state(
+                max_children=o.get("max_children") or o["generations"] * o["population"],
+                queue_size=o.get("queue_size")
+            ))
+            _save(best_ind, run_dir, o, engine.population)
+            return
+
+        start_generation = 0
+        if resume:
+            start_generation = engine.resume_from_log()
+            console.print(f"[bold]Resuming {task.name} at generation {start_generation + 1}...[/bold]")
+        else:
+            console.print(f"[bold]Starting evolution for {task.name}...[/bold]")
+        console.print(f"[dim]Output directory: {run_dir}[/dim]")
+
+        # 4. Evolve
+        try:
+            best_ind = _profiled(o.get("profile", False), run_dir,
+                                 lambda: engine.run(generations=o["generations"], start_generation=start_generation))
+        except KeyboardInterrupt:
+            console.print(f"\n[yellow]Interrupted. Continue with: uv run main.py resume {run_dir}[/yellow]")
+            raise typer.Exit(code=130)
+        population = engine.population
 
     # 5. Save Results
+    _save(best_ind, run_dir, o, population)
+
+def _parse_task_options(pairs: List[str]) -> dict:
+    """["mode=benchmark", "corpus_mb=8"] -> {"mode": "benchmark", "corpus_mb": 8} (Python literals where possible)."""
+    options = {}
+    for pair in pairs or []:
+        key, sep, value = pair.partition("=")
+        if not sep:
+            raise ValueError(f"Expected key=value, got '{pair}'")
+        try:
+            options[key.strip()] = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            options[key.strip()] = value
+    return options
+
+def _profiled(enabled: bool, run_dir: str, fn):
+    """Run `fn`, optionally under cProfile, dumping stats to <run_dir>/engine.prof."""
+    if not enabled:
+        return fn()
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(fn)
+    finally:
+        path = os.path.join(run_dir, "engine.prof")
+        os.makedirs(run_dir, exist_ok=True)
+        profiler.dump_stats(path)
+        console.print(f"[dim]Profile written to {path} (top functions by cumulative time):[/dim]")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(10)
+
+def _save(best_ind, run_dir: str, o: dict, population=()):
     if best_ind:
         console.print(f"\n[green]Evolution complete! Best fitness: {best_ind.fitness}[/green]")
         saved_path = save_result(best_ind, run_dir)
         console.print(f"Results saved to: [bold]{saved_path}[/bold]")
+        # Also index the run's programs across runs (for `results` and --warm-start)
+        results_db = o.get("results_db") or DEFAULT_RESULTS_DB
+        ResultsDB(results_db).record(run_dir, o["task_name"], o["model"], best_ind, population,
+                                     task_options=_parse_task_options(o.get("task_opt")))
+        console.print(f"[dim]Recorded in {results_db}[/dim]")
         console.print(f"Code:\n{best_ind.code}")
     else:
         console.print("[red]Evolution failed to produce any individuals.[/red]")
 
+@app.command()
+def results(
+    task: str = typer.Option(None, help="Only this task"),
+    task_opt: List[str] = typer.Option(None, "--task-opt", help="Only runs with exactly these task options "
+                                       "(key=value, repeatable; fitness is only comparable for equal options)"),
+    model: str = typer.Option(None, help="Only runs with this model"),
+    since: str = typer.Option(None, help="Only runs finished on or after this date (YYYY-MM-DD)"),
+    until: str = typer.Option(None, help="Only runs finished before this date (YYYY-MM-DD)"),
+    top: int = typer.Option(10, help="Number of programs to show"),
+    best_only: bool = typer.Option(False, help="Only each run's best program (not its final population)"),
+    show_code: bool = typer.Option(False, help="Print the code of the top program"),
+    results_db: str = typer.Option(DEFAULT_RESULTS_DB, help="Cross-run results database")
+):
+    """
+    Query the best programs recorded across runs.
+    """
+    from datetime import datetime
+    from rich.table import Table
+
+    try:
+        since_ts, until_ts = (datetime.strptime(d, "%Y-%m-%d").timestamp() if d else None for d in (since, until))
+        task_options = _parse_task_options(task_opt) if task_opt else None
+    except ValueError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(code=1)
+    if not os.path.exists(results_db):
+        console.print(f"[yellow]No results database at {results_db} yet.[/yellow]")
+        return
+    rows = ResultsDB(results_db).top(task=task, model=model, since=since_ts, until=until_ts, k=top,
+                                     best_only=best_only, task_options=task_options)
+
+    table = Table(title="Best Programs Across Runs")
+    for column in ("Rank", "Fitness", "Task", "Options", "Model", "Finished", "Code Length", "Run"):
+        table.add_column(column)
+    for i, r in enumerate(rows):
+        options = " ".join(f"{key}={value}" for key, value in r.task_options.items())
+        table.add_row(str(i + 1), f"{r.fitness:.4f}", r.task, options, r.model or "",
+                      time.strftime("%Y-%m-%d %H:%M", time.localtime(r.created)), str(len(r.code)), r.run_dir)
+    console.print(table)
+    if show_code and rows:
+        console.print(rows[0].code, markup=False)
+
+@app.command()
+def benchmark(
+    tasks: str = typer.Option("all", help="Comma-separated task names, or 'all'"),
+    generations: int = typer.Option(3, help="Generations per task"),
+    population: int = typer.Option(8, help="Population size"),
+    latency: float = typer.Option(0.05, help="Simulated LLM latency per call in seconds"),
+    tokens_per_second: float = typer.Option(None, help="Simulated LLM output token rate"),
+    concurrency: int = typer.Option(4, help="Max number of LLM requests in flight at once"),
+    evaluator: str = typer.Option("inline", help="Evaluation backend: 'inline' or 'process'"),
+    eval_workers: int = typer.Option(None, help="Parallel evaluation processes (default: CPU count)"),
+    seed: int = typer.Option(0, help="Seed for the mock LLM")
+):
+    """
+    Benchmark the engine end-to-end on each task with the offline mock LLM (no network needed).
+    """
+    from rich.table import Table
+    from src.utils.bench import run_benchmarks
+
+    task_names = registry_list_tasks() if tasks == "all" else [t.strip() for t in tasks.split(",")]
+    try:
+        results = run_benchmarks(task_names, generations=generations, population=population, latency=latency,
+                                 tokens_per_second=tokens_per_second, concurrency=concurrency,
+                                 evaluator=evaluator, eval_workers=eval_workers, seed=seed)
+    except ValueError as e:
+        console.print(f"[red]{e}[/red]")
+        raise typer.Exit(code=1)
+
+    table = Table(title="Engine Benchmark (mock LLM)")
+    for column in ("Task", "Wall (s)", "Generate (s)", "Evaluate (s)", "Overhead (s)", "LLM Calls",
+                   "Evaluations", "Best Fitness"):
+        table.add_column(column)
+    for r in results:
+        table.add_row(r.task, f"{r.wall:.3f}", f"{r.generate:.3f}", f"{r.evaluate:.3f}", f"{r.overhead:.3f}",
+                      str(r.llm_calls), str(r.evaluations), f"{r.best_fitness:.3f}")
+    console.print(table)
+
+@app.command()
+def worker(
+    queue_path: str = typer.Option(".cache/jobs.sqlite", help="SQLite job queue shared with the engine"),
+    processes: int = typer.Option(1, help="Worker processes to start on this host"),
+    evaluator: str = typer.Option("process", help="Local evaluation backend: 'inline' or 'process' (sandboxed)"),
+    eval_timeout: float = typer.Option(None, help="Wall-clock limit per evaluation in seconds (default: calibrated "
+                                       "per task, 10x its reference solution's time per stage)"),
+    memory_limit: int = typer.Option(1024, help="Address-space limit per evaluation process in MB"),
+    lease: float = typer.Option(30.0, help="Seconds a job stays leased without a heartbeat before re-dispatch"),
+    idle_exit: float = typer.Option(None, help="Exit after this many idle seconds (default: run until interrupted)")
+):
+    """
+    Evaluate candidates from the job queue filled by `run --evaluator queue`.
+    """
+    import multiprocessing
+    from src.core.jobqueue import run_worker
+
+    options = dict(path=queue_path, lease_seconds=lease, idle_exit=idle_exit,
+                   evaluator_options=dict(kind=evaluator, timeout=eval_timeout, workers=1,
+                                          memory_limit_mb=memory_limit))
+    console.print(f"[bold]Starting {processes} evaluation worker(s) on {queue_path}...[/bold]")
+    try:
+        if processes == 1:
+            done = run_worker(**options)
+            console.print(f"Completed {done} job(s).")
+            return
+        workers = [multiprocessing.Process(target=run_worker, kwargs=options)
+                   for _ in range(processes)]
+        for p in workers:
+            p.start()
+        for p in workers:
+            p.join()
+    except KeyboardInterrupt:
+        console.print("\n[yellow]Worker stopped.[/yellow]")
+
+@app.command()
+def startup(
+    repeats: int = typer.Option(5, help="Fresh interpreters per measurement (the median is reported)"),
+    max_seconds: float = typer.Option(None, help="Fail (exit code 1) if `import main` takes longer than this")
+):
+    """
+    Measure CLI startup: import time of main.py, the engine and heavy dependencies in fresh interpreters.
+    """
+    from rich.table import Table
+    from src.utils.bench import measure_startup
+
+    results = measure_startup(repeats=repeats)
+    table = Table(title="Startup / Import Time")
+    table.add_column("Measurement")
+    table.add_column("Seconds (median)")
+    for r in results:
+        table.add_row(r.name, f"{r.seconds:.3f}")
+    console.print(table)
+
+    main_seconds = next(r.seconds for r in results if r.name == "import main")
+    if max_seconds is not None and main_seconds > max_seconds:
+        console.print(f"[red]`import main` took {main_seconds:.3f}s (limit {max_seconds}s)[/red]")
+        raise typer.Exit(code=1)
+
 @app.command()
 def list_tasks():
     """List available tasks."""
@@ -0,0 +1,65 @@
+import ast
+import hashlib
+import re
+from typing import Dict, Optional
+from src.core.types import EvaluationResult
+from src.tasks.candidate import extract_code
+
+
+def _strip_docstrings(tree: ast.AST) -> ast.AST:
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Module, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            body = node.body
+            if body and isinstance(body[0], ast.Expr) and isinstance(body[0].value, ast.Constant) \
+                    and isinstance(body[0].value.value, str):
+                node.body = body[1:] or [ast.Pass()]
+    return tree
+
+
+def canonical_hash(code: str) -> str:
+    """
+    Hash a program so that formatting-, comment- and docstring-only variants collide.
+
+    Parses the code and hashes the AST dump (which ignores comments, whitespace and
+    line numbers). Code that does not parse falls back to a whitespace-normalized hash.
+    """
+    clean_code = extract_code(code)
+    try:
+        tree = _strip_docstrings(ast.parse(clean_code))
+        canonical = ast.dump(tree, annotate_fields=False)
+    except (SyntaxError, ValueError):
+        lines = [re.sub(r"\s+", " ", line).strip() for line in clean_code.splitlines()]
+        canonical = "\n".join(line for line in lines if line and not line.startswith("#"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class FitnessCache:
+    """In-memory map from (task, canonical program hash) to its evaluation result."""
+
+    def __init__(self):
+        self._entries: Dict[str, EvaluationResult] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(task_name: str, code: str) -> str:
+        return f"{task_name}:{canonical_hash(code)}"
+
+    def get(self, key: str) -> Optional[EvaluationResult]:
+        result = self._entries.get(key)
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put(self, key: str, result: EvaluationResult):
+        self._entries[key] = result
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
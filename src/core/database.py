@@ -0,0 +1,153 @@
+import bisect
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+from src.core.types import Individual
+
+# Default MAP-Elites feature bin edges
+LENGTH_BINS = (200, 400, 800, 1600, 3200)        # characters of code
+RUNTIME_BINS = (0.001, 0.01, 0.1, 1.0)           # seconds per evaluation
+
+
+class ProgramDatabase:
+    """
+    Archive of every evaluated program, with a MAP-Elites grid over
+    (code length, evaluation runtime) that keeps the fittest program per cell.
+
+    Backed by SQLite with indexes on fitness and cell, so top-k lookups and elite
+    sampling stay O(log n) as the archive grows.
+    """
+
+    def __init__(self, path: str = ":memory:", length_bins: Sequence[float] = LENGTH_BINS,
+                 runtime_bins: Sequence[float] = RUNTIME_BINS, seed: int = None):
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.length_bins = sorted(length_bins)
+        self.runtime_bins = sorted(runtime_bins)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS programs (
+                id TEXT PRIMARY KEY,
+                task TEXT NOT NULL,
+                code TEXT NOT NULL,
+                fitness REAL NOT NULL,
+                feedback TEXT,
+                generation INTEGER,
+                parent_id TEXT,
+                code_length INTEGER,
+                runtime REAL,
+                cell TEXT,
+                created REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_programs_task_fitness ON programs(task, fitness DESC);
+            CREATE INDEX IF NOT EXISTS idx_programs_task_cell ON programs(task, cell);
+            CREATE TABLE IF NOT EXISTS elites (
+                task TEXT NOT NULL,
+                cell TEXT NOT NULL,
+                program_id TEXT NOT NULL,
+                fitness REAL NOT NULL,
+                PRIMARY KEY (task, cell)
+            );
+        """)
+        self._conn.commit()
+
+    def cell(self, ind: Individual) -> Tuple[int, int]:
+        """MAP-Elites grid coordinates of an individual."""
+        return (bisect.bisect_right(self.length_bins, len(ind.code)),
+                bisect.bisect_right(self.runtime_bins, ind.runtime))
+
+    def add(self, task: str, ind: Individual) -> bool:
+        """Store an evaluated individual. Returns True if it became the elite of its cell."""
+        cell = "%d,%d" % self.cell(ind)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO programs "
+                "(id, task, code, fitness, feedback, generation, parent_id, code_length, runtime, cell, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (ind.id, task, ind.code, ind.fitness, ind.feedback, ind.generation, ind.parent_id,
+                 len(ind.code), ind.runtime, cell, time.time())
+            )
+            row = self._conn.execute(
+                "SELECT fitness FROM elites WHERE task = ? AND cell = ?", (task, cell)
+            ).fetchone()
+            improved = row is None or ind.fitness > row[0]
+            if improved:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO elites (task, cell, program_id, fitness) VALUES (?, ?, ?, ?)",
+                    (task, cell, ind.id, ind.fitness)
+                )
+            self._conn.commit()
+            return improved
+
+    def _to_individual(self, row) -> Individual:
+        id_, code, fitness, feedback, generation, parent_id, runtime = row
+        return Individual(code=code, fitness=fitness, feedback=feedback or "", id=id_,
+                          generation=generation or 0, parent_id=parent_id, runtime=runtime or 0.0)
+
+    _COLUMNS = "p.id, p.code, p.fitness, p.feedback, p.generation, p.parent_id, p.runtime"
+
+    def top(self, task: str, k: int = 1) -> List[Individual]:
+        """The k fittest programs ever stored for a task."""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM programs p WHERE p.task = ? ORDER BY p.fitness DESC LIMIT ?",
+                (task, k)
+            ).fetchall()
+        return [self._to_individual(r) for r in rows]
+
+    def elites(self, task: str) -> List[Individual]:
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM elites e JOIN programs p ON p.id = e.program_id "
+                "WHERE e.task = ? ORDER BY e.fitness DESC",
+                (task,)
+            ).fetchall()
+        return [self._to_individual(r) for r in rows]
+
+    def sample_parent(self, task: str, exploit: float = 0.3) -> Optional[Individual]:
+        """
+        Pick a parent: with probability `exploit` one of the fittest programs,
+        otherwise a uniformly random occupied MAP-Elites cell.
+        """
+        if self._rng.random() < exploit:
+            top = self.top(task, k=3)
+            return self._rng.choice(top) if top else None
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM elites WHERE task = ?", (task,)).fetchone()
+            if count == 0:
+                return None
+            row = self._conn.execute(
+                f"SELECT {self._COLUMNS} FROM elites e JOIN programs p ON p.id = e.program_id "
+                "WHERE e.task = ? ORDER BY e.cell LIMIT 1 OFFSET ?",
+                (task, self._rng.randrange(count))
+            ).fetchone()
+        return self._to_individual(row)
+
+    def sample_inspirations(self, task: str, k: int = 2, exclude_id: str = None) -> List[Individual]:
+        """Up to k distinct programs to show alongside a parent: the best ones plus random elites."""
+        candidates = {ind.id: ind for ind in self.top(task, k=k + 1)}
+        for _ in range(k):
+            ind = self.sample_parent(task, exploit=0.0)
+            if ind:
+                candidates.setdefault(ind.id, ind)
+        candidates.pop(exclude_id, None)
+        picked = list(candidates.values())
+        self._rng.shuffle(picked)
+        return picked[:k]
+
+    def stats(self, task: str) -> Tuple[int, int]:
+        """(number of stored programs, number of occupied cells) for a task."""
+        with self._lock:
+            (programs,) = self._conn.execute("SELECT COUNT(*) FROM programs WHERE task = ?", (task,)).fetchone()
+            (cells,) = self._conn.execute("SELECT COUNT(*) FROM elites WHERE task = ?", (task,)).fetchone()
+        return programs, cells
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,63 @@
+import re
+from typing import List, Tuple
+
+# A SEARCH/REPLACE block as emitted by the model:
+# <<<<<<< SEARCH
+# old lines
+# =======
+# new lines
+# >>>>>>> REPLACE
+BLOCK_RE = re.compile(r"<{5,}\s*SEARCH[^\n]*\n(.*?)\n?={5,}[^\n]*\n(.*?)\n?>{5,}\s*REPLACE", re.DOTALL)
+
+
+class PatchError(ValueError):
+    pass
+
+
+def parse_diff(text: str) -> List[Tuple[str, str]]:
+    """Extract (search, replace) pairs from a model response."""
+    return [(search, replace) for search, replace in BLOCK_RE.findall(text)]
+
+
+def _find_loose(code_lines: List[str], search_lines: List[str]) -> List[int]:
+    """Start indices of every run of lines matching `search_lines`, ignoring surrounding whitespace."""
+    target = [line.strip() for line in search_lines]
+    stripped = [line.strip() for line in code_lines]
+    return [i for i in range(len(stripped) - len(target) + 1) if stripped[i:i + len(target)] == target]
+
+
+def _first_line(search: str) -> str:
+    return search.strip().splitlines()[0] if search.strip() else "<empty>"
+
+
+def apply_diff(code: str, diff_text: str) -> str:
+    """
+    Apply every SEARCH/REPLACE block in `diff_text` to `code`.
+
+    Each SEARCH section must match exactly once, either exactly or line by line ignoring
+    leading/trailing whitespace. Raises PatchError if there are no blocks or one
+    does not match, or matches several places (which one was meant is unknown).
+    """
+    blocks = parse_diff(diff_text)
+    if not blocks:
+        raise PatchError("No SEARCH/REPLACE blocks found")
+
+    for search, replace in blocks:
+        count = code.count(search) if search else 0
+        if count > 1:
+            raise PatchError(f"SEARCH block matches {count} places in parent code: {_first_line(search)!r}")
+        if count == 1:
+            code = code.replace(search, replace, 1)
+            continue
+
+        code_lines = code.splitlines()
+        search_lines = search.splitlines()
+        starts = _find_loose(code_lines, search_lines) if search_lines else []
+        if not starts:
+            raise PatchError(f"SEARCH block not found in parent code: {_first_line(search)!r}")
+        if len(starts) > 1:
+            raise PatchError(f"SEARCH block matches {len(starts)} places in parent code: {_first_line(search)!r}")
+        start = starts[0]
+        code = "\n".join(code_lines[:start] + replace.splitlines() + code_lines[start + len(search_lines):])
+
+    return code
@@ -1,56 +1,135 @@
-from typing import List, Optional
+from typing import Callable, List, Optional
 import time
-import signal
-from contextlib import contextmanager
+import queue
+import random
+import threading
+from collections import Counter
 from rich.console import Console
 from rich.progress import track, Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
 from rich.table import Table
-from src.core.llm import LLMProvider
-from src.core.types import Individual
+from src.core.llm import BaseLLMProvider
+from src.core.scheduler import BudgetExhausted
+from src.core.types import Individual, EvaluationResult
+from src.core.evaluator import InlineEvaluator, TimeoutException, time_limit
+from src.core.cache import FitnessCache
+from src.core.database import ProgramDatabase
+from src.core.pareto import OBJECTIVE_NAMES, crowded_tournament, nsga2_select, objectives_for, pareto_front
+from src.core.diff import apply_diff, PatchError
+from src.core.similarity import NearDuplicateIndex
+from src.utils.runlog import RunLog
+from src.core.tracing import Tracer
 from src.tasks.base import AbstractBaseTask
 
-try:
-    from tensorboardX import SummaryWriter
-except ImportError:
-    SummaryWriter = None
 
-console = Console()
+def _summary_writer(log_dir: str):
+    """TensorBoard writer, or None without tensorboardX (imported here since it is slow to load)."""
+    try:
+        from tensorboardX import SummaryWriter
+    except ImportError:
+        return None
+    return SummaryWriter(log_dir=log_dir)
 
-# Timeout context manager (Unix only usually, but we'll try careful threading or just simple alarm if on Linux, 
-# but for Windows we might need a thread-based approach. 
-# Implementing a simple thread-based timeout for cross-platform compatibility.)
-import threading
-import _thread
 
-class TimeoutException(Exception):
-    pass
+console = Console()
 
-@contextmanager
-def time_limit(seconds):
-    if seconds is None:
-        yield
-        return
-        
-    timer = threading.Timer(seconds, lambda: _thread.interrupt_main())
-    timer.start()
-    try:
-        yield
-    except KeyboardInterrupt:
-        raise TimeoutException("Timed out!")
-    finally:
-        timer.cancel()
+DEDUP_POLICIES = ("skip", "reuse", "reprompt")
+
+# Appended to the mutation prompt when a child nearly duplicated an existing program
+DUPLICATE_HINT = ("Your previous answer was nearly identical to a program that was already evaluated. "
+                  "Make a substantially different change this time.")
 
 class EvolutionEngine:
-    def __init__(self, llm: LLMProvider, task: AbstractBaseTask, population_size: int = 5, log_dir: str = None):
+    def __init__(self, llm: BaseLLMProvider, task: AbstractBaseTask, population_size: int = 5, log_dir: str = None,
+                 concurrency: int = 1, evaluator=None, fitness_cache: bool = True, remeasure_timed: bool = False,
+                 selection: str = "rank", database: ProgramDatabase = None, num_inspirations: int = 2,
+                 run_log: RunLog = None, mutation_mode: str = "full", tracer: Tracer = None,
+                 children_per_call: int = 1, dedup_threshold: float = None, dedup_policy: str = "skip"):
         self.llm = llm
         self.task = task
         self.population_size = population_size
+        # Max number of LLM requests in flight at once during seeding / mutation
+        self.concurrency = max(1, concurrency)
+        # Evaluation backend; defaults to in-process evaluation with the task's calibrated timeouts
+        self.evaluator = evaluator or InlineEvaluator()
+        # Results keyed by canonical program hash, so duplicates and elites are never re-executed
+        self.fitness_cache = FitnessCache() if fitness_cache else None
+        # Timing-based tasks may ask to re-measure instead of reusing a cached score
+        self.remeasure = remeasure_timed and self.task.timing_sensitive
+        # Parent selection: "rank" cycles through the sorted population,
+        # "map-elites" samples parents and inspirations from the program database,
+        # "nsga2" keeps a Pareto-ranked population over fitness, runtime, memory and code length
+        if selection not in ("rank", "map-elites", "nsga2"):
+            raise ValueError(f"Unknown selection strategy: {selection}")
+        self.selection = selection
+        if database is None and selection == "map-elites":
+            database = ProgramDatabase(f"{log_dir}/programs.sqlite" if log_dir else ":memory:")
+        # Archive of every evaluated individual (optional for rank selection)
+        self.database = database
+        self.num_inspirations = num_inspirations
+        # "full" asks for the whole program, "diff" for SEARCH/REPLACE edits of the parent
+        if mutation_mode not in ("full", "diff"):
+            raise ValueError(f"Unknown mutation mode: {mutation_mode}")
+        self.mutation_mode = mutation_mode
+        # Children requested per LLM call (one prefill per parent for several siblings)
+        self.children_per_call = max(1, children_per_call)
+        # output_chars counts outputs that became children; failed_patch_chars the diffs that did not apply
+        self.mutation_stats = {"children": 0, "output_chars": 0, "patch_failures": 0, "failed_patch_chars": 0,
+                               "calls": 0, "tokens": 0}
+        # Near-duplicate detection of new children against every program evaluated so far
+        # (MinHash/LSH, off without a threshold). "skip" drops them, "reuse" gives them the
+        # duplicated program's result without evaluating (until it tops the population, see
+        # _confirm_best), "reprompt" asks the LLM once more
+        if dedup_policy not in DEDUP_POLICIES:
+            raise ValueError(f"Unknown near-duplicate policy: {dedup_policy}")
+        self.dedup_policy = dedup_policy
+        self.dedup_index = NearDuplicateIndex(dedup_threshold) if dedup_threshold else None
+        self.dedup_stats = Counter()
+        self._dedup_lock = threading.Lock()
+        self._indexed = {}  # id -> evaluated individual in the index
+        self._signatures = {}  # id -> signature of a kept child awaiting evaluation
+        self._reused_results = {}  # cache key -> result copied from the duplicated program
+        self._stats_lock = threading.Lock()
+        self._population_lock = threading.Lock()
+        # How many fresh evaluations ended at each cascade stage
+        self.stage_exits = Counter()
+        # Seconds spent generating (LLM) and evaluating, summed across threads
+        self.phase_times = Counter()
+        # Children evaluated per minute in the last steady-state run
+        self.throughput = 0.0
+        # Set once the LLM scheduler reports the run's request/token budget is spent
+        self.budget_exhausted = False
+        # Streaming log + checkpoints so an interrupted run can be resumed
+        self.run_log = run_log
+        self._logged_evaluations = set()
+        # Children generated before an interruption, used before asking the LLM for more
+        self._pending_children: List[Individual] = []
         self.population: List[Individual] = []
-        self.writer = SummaryWriter(log_dir=log_dir) if SummaryWriter and log_dir else None
+        self.log_dir = log_dir
+        self.writer = _summary_writer(log_dir) if log_dir else None
+        # Spans for LLM calls, evaluations and phases; exported to <log_dir>/trace.json
+        self.tracer = tracer or Tracer()
+        self.llm.tracer = self.tracer
+
+    def print_pareto_front(self):
+        """Print the first non-dominated front of the population (multi-objective selection)."""
+        table = Table(title="Pareto Front")
+        for name in ("Fitness", "Runtime (ms)", "Memory (KB)", "Code Length"):
+            table.add_column(name)
+        for ind in pareto_front(self.population):
+            table.add_row(f"{ind.fitness:.3f}", f"{ind.runtime * 1000:.1f}", f"{ind.peak_memory_kb:.0f}",
+                          str(len(ind.code)))
+        console.print(table)
+
+    def print_dedup_summary(self):
+        if self.dedup_stats["checked"]:
+            console.print(f"[dim]Near-duplicates ({self.dedup_policy}): {self.dedup_stats['duplicates']} of "
+                          f"{self.dedup_stats['checked']} children, {self.dedup_stats['skipped']} skipped, "
+                          f"{self.dedup_stats['reused']} reused, {self.dedup_stats['reprompted']} re-prompted, "
+                          f"{len(self.dedup_index)} programs indexed[/dim]")
 
-    def print_generation_summary(self, generation: int, total_gens: int):
+    def print_generation_summary(self, generation: int, total_gens: int, title: str = None):
         """Print a summary table of the current population."""
-        table = Table(title=f"Generation {generation}/{total_gens} Summary")
+        table = Table(title=title or f"Generation {generation}/{total_gens} Summary")
         table.add_column("Rank", style="cyan", no_wrap=True)
         table.add_column("Fitness", style="magenta")
         table.add_column("Code Length", style="green")
@@ -85,47 +164,348 @@ class EvolutionEngine:
         console.print(f"[bold green]Seeding population for task: {self.task.name}[/bold green]")
         prompt = self.task.initial_prompt()
         
-        # Use simple track for progress
-        for i in track(range(self.population_size), description="Generating initial solutions..."):
-            try:
-                code = self.llm.generate(
-                    prompt=prompt,
-                    system_prompt="You are an expert Python coder. Output only valid Python code."
+        seeds = {}
+
+        def on_result(index, result):
+            if not isinstance(result, Exception):
+                seeds[index] = Individual(code=result)
+                if self.run_log:
+                    self.run_log.log_generated(seeds[index])
+
+        start = time.perf_counter()
+        with console.status(f"Generating initial solutions ({self.concurrency} in flight)...", spinner="dots"), \
+                self.tracer.span("phase.seed", "phase"):
+            results = self.llm.generate_many(
+                [prompt] * (self.population_size - len(self.population)),
+                system_prompt="You are an expert Python coder. Output only valid Python code.",
+                max_concurrency=self.concurrency,
+                on_result=on_result
+            )
+        self.phase_times["generate"] += time.perf_counter() - start
+
+        for index, result in enumerate(results):
+            if isinstance(result, BudgetExhausted):
+                self.budget_exhausted = True
+            elif isinstance(result, Exception):
+                console.print(f"[red]Error generating individual: {result}[/red]")
+            else:
+                self.population.append(seeds[index])
+
+        if self.run_log:
+            self.run_log.checkpoint(0, self.population)
+
+    def evaluate_individuals(self, individuals: List[Individual], threshold: float = 0.0, fresh: bool = False):
+        """
+        Evaluate individuals in place, skipping programs already in the fitness cache
+        (unless `fresh`, which also runs programs holding a reused result).
+
+        For cascade tasks, candidates that provably cannot reach `threshold` stop early; their
+        fitness is partial (`Individual.partial`), so it is neither cached nor indexed for dedup.
+        """
+        groups = {}  # cache key -> individuals sharing that canonical program
+        for ind in individuals:
+            groups.setdefault(FitnessCache.key(self.task.name, ind.code), []).append(ind)
+
+        results = {}
+        for key, members in groups.items():
+            if key in self._reused_results and not fresh:
+                results[key] = self._reused_results.pop(key)
+                if self.fitness_cache is not None:
+                    self.fitness_cache.put(key, results[key])
+                continue
+            if self.fitness_cache is None:
+                continue
+            # Duplicates within the batch are served by the single evaluation below
+            self.fitness_cache.hits += len(members) - 1
+            if self.remeasure or fresh:
+                continue
+            cached = self.fitness_cache.get(key)
+            if cached is not None:
+                results[key] = cached
+
+        missing = [key for key in groups if key not in results]
+        if missing:
+            start = time.perf_counter()
+            fresh = self.evaluator.evaluate_batch(self.task, [groups[key][0].code for key in missing], threshold)
+            self.phase_times["evaluate"] += time.perf_counter() - start
+            for key, result in zip(missing, fresh):
+                self.tracer.add("evaluate", "evaluation", result.started or start, result.duration,
+                                cpu_time=result.cpu_time, peak_memory_kb=result.peak_memory_kb,
+                                fitness=result.fitness, stage=result.stage, outcome=result.feedback[:80])
+                results[key] = result
+                if result.stage:
+                    self.stage_exits[result.stage] += 1
+                if self.fitness_cache is not None and not result.partial:
+                    self.fitness_cache.put(key, result)
+
+        for key, members in groups.items():
+            for ind in members:
+                ind.fitness = results[key].fitness
+                ind.runtime = results[key].duration
+                ind.peak_memory_kb = results[key].peak_memory_kb
+                ind.objectives = objectives_for(ind)
+                ind.partial = results[key].partial
+                ind.reused = results[key].reused
+                if results[key].feedback:
+                    ind.feedback = results[key].feedback
+
+        if self.dedup_index is not None:
+            with self._dedup_lock:
+                for ind in individuals:
+                    signature = self._signatures.pop(ind.id, None)
+                    if ind.id not in self._indexed and not ind.partial:
+                        signature = signature or self.dedup_index.signature(ind.code)
+                        self.dedup_index.add(ind.id, signature)
+                        self._indexed[ind.id] = ind
+
+    def resume_from_log(self) -> int:
+        """
+        Restore state from `self.run_log` and return the generation to continue from.
+
+        The checkpointed population is restored, logged evaluations are seeded into the
+        fitness cache so they are not re-executed, and children generated after the
+        checkpoint are reused instead of calling the LLM again.
+        """
+        individuals, evaluated = self.run_log.load_individuals()
+        checkpoint = self.run_log.load_checkpoint()
+        if checkpoint:
+            start_generation = checkpoint["generation"]
+            self.population = [Individual(**data) for data in checkpoint["population"]]
+        else:
+            # Interrupted while seeding
+            start_generation = 0
+            self.population = [ind for ind in individuals.values() if ind.generation == 0][:self.population_size]
+
+        if self.fitness_cache is not None:
+            for ind_id in evaluated:
+                ind = individuals[ind_id]
+                self.fitness_cache.put(FitnessCache.key(self.task.name, ind.code),
+                                       EvaluationResult(fitness=ind.fitness, feedback=ind.feedback, duration=ind.runtime))
+        self._logged_evaluations = set(evaluated)
+
+        in_population = {ind.id for ind in self.population}
+        self._pending_children = [
+            ind for ind in individuals.values()
+            if ind.generation > start_generation and ind.id not in in_population
+        ]
+        return start_generation
+
+    def select_parents(self, count: int, offset: int = 0) -> List[Individual]:
+        """Choose `count` parents for the next round of mutations."""
+        if self.selection == "nsga2":
+            return crowded_tournament(self.population, count)
+        if self.selection == "map-elites":
+            parents = [self.database.sample_parent(self.task.name) for _ in range(count)]
+            if all(parents):
+                return parents
+        return [self.population[(offset + i) % len(self.population)] for i in range(count)]
+
+    def mutation_prompt_for(self, parent: Individual, mode: str = "full", hint: str = None) -> str:
+        build_prompt = self.task.diff_mutation_prompt if mode == "diff" else self.task.mutation_prompt
+        prompt = None
+        if self.selection == "map-elites" and self.num_inspirations > 0:
+            inspirations = self.database.sample_inspirations(self.task.name, k=self.num_inspirations,
+                                                             exclude_id=parent.id)
+            if inspirations:
+                prompt = build_prompt(parent.code, parent.feedback, parent.fitness, inspirations=inspirations)
+        prompt = prompt or build_prompt(parent.code, parent.feedback, parent.fitness)
+        return f"{prompt}\n\n{hint}" if hint else prompt
+
+    def generate_children(self, parents: List[Individual], generation: int, hint: str = None) -> List[Individual]:
+        """
+        Ask the LLM for `children_per_call` children per parent, one request per parent.
+        In diff mode the model returns SEARCH/REPLACE blocks that are applied to the parent;
+        children whose patch fails to apply fall back to a full rewrite. Near-duplicates
+        are then handled by `filter_near_duplicates`; `hint` is appended to every prompt.
+        """
+        start = time.perf_counter()
+        children = {}  # (parent index, choice) -> child
+        failed_patches = []
+        output_chars = []
+        failed_patch_chars = []
+        usage = Counter()
+
+        def make_on_result(mode, slot):
+            def on_result(index, result):
+                if isinstance(result, BudgetExhausted):
+                    self.budget_exhausted = True
+                if isinstance(result, Exception):
+                    return
+                for choice, output in enumerate(result if isinstance(result, list) else [result]):
+                    key = slot(index, choice)
+                    parent = parents[key[0]]
+                    code = output
+                    if mode == "diff":
+                        try:
+                            code = apply_diff(parent.code, output)
+                        except PatchError:
+                            failed_patches.append(key)
+                            failed_patch_chars.append(len(output))
+                            continue
+                    output_chars.append(len(output))
+                    # Log each child as it arrives so an interrupted round is not lost
+                    children[key] = Individual(code=code, generation=generation, parent_id=parent.id)
+                    if self.run_log:
+                        self.run_log.log_generated(children[key])
+            return on_result
+
+        # Use a more open system prompt to allow for the reasoning/comments requested
+        self.llm.generate_many(
+            [self.mutation_prompt_for(p, self.mutation_mode, hint) for p in parents],
+            system_prompt="You are an expert Python evolutionary coder.",
+            max_concurrency=self.concurrency,
+            on_result=make_on_result(self.mutation_mode, lambda index, choice: (index, choice)),
+            n=self.children_per_call,
+            usage=usage
+        )
+        if failed_patches and not self.budget_exhausted:
+            retry = sorted(failed_patches)
+            self.llm.generate_many(
+                [self.mutation_prompt_for(parents[i], "full", hint) for i, _ in retry],
+                system_prompt="You are an expert Python evolutionary coder.",
+                max_concurrency=self.concurrency,
+                on_result=make_on_result("full", lambda j, choice: retry[j]),
+                usage=usage
+            )
+
+        with self._stats_lock:
+            self.phase_times["generate"] += time.perf_counter() - start
+            self.mutation_stats["children"] += len(children)
+            self.mutation_stats["output_chars"] += sum(output_chars)
+            self.mutation_stats["patch_failures"] += len(failed_patches)
+            self.mutation_stats["failed_patch_chars"] += sum(failed_patch_chars)
+            self.mutation_stats["calls"] += usage["calls"]
+            self.mutation_stats["tokens"] += usage["tokens"]
+        # A re-prompted round is not re-prompted again
+        return self.filter_near_duplicates(parents, [children[key] for key in sorted(children)], generation,
+                                           reprompt=hint is None)
+
+    def filter_near_duplicates(self, parents: List[Individual], children: List[Individual], generation: int,
+                               reprompt: bool = True) -> List[Individual]:
+        """
+        Apply the near-duplicate policy to new children (no-op without a threshold). A child
+        is a near-duplicate if the index holds an evaluated program at least `threshold`
+        similar, or an earlier sibling in this batch is (those are always dropped).
+        """
+        if self.dedup_index is None or not children:
+            return children
+        index = self.dedup_index
+        siblings = NearDuplicateIndex(index.threshold)
+        kept, duplicates, reused = [], [], 0
+        for child in children:
+            signature = index.signature(child.code)
+            with self._dedup_lock:
+                match = index.query(signature)
+                original = self._indexed.get(match[0]) if match else None
+            if match is None and siblings.query(signature) is None:
+                self._signatures[child.id] = signature
+                siblings.add(child.id, signature)
+                kept.append(child)
+            elif self.dedup_policy == "reuse" and original is not None:
+                self._reused_results[FitnessCache.key(self.task.name, child.code)] = EvaluationResult(
+                    fitness=original.fitness, feedback=original.feedback, duration=original.runtime,
+                    peak_memory_kb=original.peak_memory_kb, reused=True
                 )
-                self.population.append(Individual(code=code))
-            except Exception as e:
-                console.print(f"[red]Error generating individual: {e}[/red]")
+                reused += 1
+                kept.append(child)
+            else:
+                duplicates.append(child)
 
-    def run(self, generations: int = 3) -> Optional[Individual]:
-        """Run the evolutionary loop and return the best individual."""
-        if not self.population:
+        # One new request per duplicate (or per `children_per_call` duplicates of a parent)
+        retry_parents = []
+        if self.dedup_policy == "reprompt" and reprompt and duplicates and not self.budget_exhausted:
+            by_id = {p.id: p for p in parents}
+            retry_parents = [by_id[child.parent_id] for child in duplicates if child.parent_id in by_id]
+            retry_parents = retry_parents[::self.children_per_call]
+        with self._dedup_lock:
+            self.dedup_stats["checked"] += len(children)
+            self.dedup_stats["duplicates"] += len(duplicates) + reused
+            self.dedup_stats["reused"] += reused
+            self.dedup_stats["skipped"] += len(duplicates)
+            self.dedup_stats["reprompted"] += len(retry_parents)
+        if retry_parents:
+            kept += self.generate_children(retry_parents, generation, hint=DUPLICATE_HINT)[:len(duplicates)]
+        return kept
+
+    def add_immigrants(self, immigrants: List[Individual]):
+        """
+        Insert already-evaluated individuals from elsewhere (e.g. another island),
+        replacing the worst members. Their scores are seeded into the fitness cache
+        so they are not re-executed.
+        """
+        for ind in immigrants:
+            ind.objectives = objectives_for(ind)
+            if self.fitness_cache is not None:
+                self.fitness_cache.put(FitnessCache.key(self.task.name, ind.code),
+                                       EvaluationResult(fitness=ind.fitness, feedback=ind.feedback))
+            if len(self.population) < self.population_size:
+                self.population.append(ind)
+            elif self.population and ind.fitness > self.population[-1].fitness:
+                self.population[-1] = ind
+            self.population.sort(key=lambda x: x.fitness, reverse=True)
+
+    def run(self, generations: int = 3,
+            on_generation: Callable[[int, "EvolutionEngine"], None] = None,
+            start_generation: int = 0) -> Optional[Individual]:
+        """
+        Run the evolutionary loop and return the best individual.
+
+        `start_generation` skips generations already completed (see `resume_from_log`).
+
+        `on_generation(gen, engine)` is called after each generation is evaluated and
+        sorted, before selection; it may modify the population (e.g. for migration).
+        """
+        if start_generation == 0 and len(self.population) < self.population_size:
             self.seed_population()
 
-        for gen in range(generations):
+        for gen in range(start_generation, generations):
             console.rule(f"[bold blue]Generation {gen + 1}/{generations}[/bold blue]")
+            gen_start = time.perf_counter()
             
             # 1. Evaluate
-            with console.status("Evaluating population...", spinner="dots"):
+            with console.status("Evaluating population...", spinner="dots"), \
+                    self.tracer.span("phase.evaluate", "phase", generation=gen):
+                self.evaluate_individuals(self.population)
+            if self.database is not None:
                 for ind in self.population:
-                    try:
-                        # Enforce timeout of 5 seconds per evaluation to prevent hangs
-                        # Using a simple try/except block with threading timer logic above
-                        try:
-                            # Note: Windows signal.alarm is not supported, so using the thread hack
-                            with time_limit(5): 
-                                score = self.task.evaluate(ind.code)
-                                ind.fitness = score
-                        except TimeoutException:
-                            ind.fitness = 0.0
-                            ind.feedback = "Execution Timed Out (>5s)"
-                            
-                    except Exception as e:
-                        ind.fitness = 0.0
-                        ind.feedback = str(e)
+                    self.database.add(self.task.name, ind)
+            if self.run_log:
+                for ind in self.population:
+                    if ind.id not in self._logged_evaluations:
+                        self.run_log.log_evaluated(ind)
+                        self._logged_evaluations.add(ind.id)
             
             # 2. Sort & Display
+            if self.selection == "nsga2" and len(self.population) > self.population_size:
+                # Survivors of parents + children by Pareto rank, then crowding distance
+                self.population = nsga2_select(self.population, self.population_size)
             self.population.sort(key=lambda x: x.fitness, reverse=True)
+            if on_generation:
+                on_generation(gen, self)
+                self.population.sort(key=lambda x: x.fitness, reverse=True)
+            self._confirm_best()
             self.print_generation_summary(gen + 1, generations)
+            if self.selection == "nsga2":
+                self.print_pareto_front()
+            if self.fitness_cache is not None:
+                console.print(f"[dim]Fitness cache: {self.fitness_cache.hits} hits, "
+                              f"{self.fitness_cache.misses} misses[/dim]")
+            if self.stage_exits:
+                console.print("[dim]Cascade exits: " + ", ".join(
+                    f"{stage} {count}" for stage, count in self.stage_exits.items()) + "[/dim]")
+            if self.mutation_stats["children"]:
+                console.print(f"[dim]Mutations ({self.mutation_mode}): "
+                              f"{self.mutation_stats['output_chars'] / self.mutation_stats['children']:.0f} output chars/child, "
+                              f"{self.mutation_stats['patch_failures']} patch fallbacks "
+                              f"({self.mutation_stats['failed_patch_chars']} chars), "
+                              f"{self.mutation_stats['children'] / max(1, self.mutation_stats['calls']):.2f} children/call, "
+                              f"{self.mutation_stats['tokens'] / self.mutation_stats['children']:.0f} tokens/child[/dim]")
+            self.print_dedup_summary()
+            llm_stats = self.llm.stats()
+            if llm_stats:
+                console.print(f"[dim]LLM: {llm_stats['requests']} requests, {llm_stats['tokens']} tokens, "
+                              f"concurrency limit {llm_stats['concurrency_limit']:.1f}, "
+                              f"queue depth {llm_stats['queue_depth']}[/dim]")
             
             # 3. Logging
             if self.writer:
@@ -136,36 +516,250 @@ class EvolutionEngine:
                 self.writer.add_scalar(f"Fitness/Best", best_fitness, gen)
                 self.writer.add_scalar(f"Fitness/Avg", avg_fitness, gen)
                 self.writer.add_scalar(f"Stats/CodeLen", avg_len, gen)
+                if self.fitness_cache is not None:
+                    self.writer.add_scalar(f"Cache/Hits", self.fitness_cache.hits, gen)
+                    self.writer.add_scalar(f"Cache/Misses", self.fitness_cache.misses, gen)
+                if self.mutation_stats["children"]:
+                    self.writer.add_scalar(f"Mutation/OutputCharsPerChild",
+                                           self.mutation_stats["output_chars"] / self.mutation_stats["children"], gen)
+                    self.writer.add_scalar(f"Mutation/PatchFailures", self.mutation_stats["patch_failures"], gen)
+                    self.writer.add_scalar(f"Mutation/FailedPatchChars", self.mutation_stats["failed_patch_chars"], gen)
+                    self.writer.add_scalar(f"Mutation/ChildrenPerCall",
+                                           self.mutation_stats["children"] / max(1, self.mutation_stats["calls"]), gen)
+                    self.writer.add_scalar(f"Mutation/TokensPerChild",
+                                           self.mutation_stats["tokens"] / self.mutation_stats["children"], gen)
+                for stage, count in self.stage_exits.items():
+                    self.writer.add_scalar(f"Cascade/Exits/{stage}", count, gen)
+                if self.database is not None:
+                    programs, cells = self.database.stats(self.task.name)
+                    self.writer.add_scalar(f"Archive/Programs", programs, gen)
+                    self.writer.add_scalar(f"Archive/Cells", cells, gen)
+                for key, value in llm_stats.items():
+                    self.writer.add_scalar(f"LLM/{key}", value, gen)
+                for key, value in self.dedup_stats.items():
+                    self.writer.add_scalar(f"Dedup/{key}", value, gen)
+                if self.selection == "nsga2":
+                    front = pareto_front(self.population)
+                    self.writer.add_scalar("Pareto/FrontSize", len(front), gen)
+                    for m, name in enumerate(OBJECTIVE_NAMES):
+                        self.writer.add_scalar(f"Pareto/Best_{name}",
+                                               (max if m == 0 else min)(ind.objectives[m] for ind in front), gen)
+                    self.writer.add_text("Pareto/Front", "\n".join(
+                        "| " + " | ".join(f"{v:.4g}" for v in ind.objectives) + " |" for ind in front
+                    ), gen)
+                self.tracer.write_tensorboard(self.writer, gen)
             
             best = self.population[0]
-            if best.fitness == 1.0:
+            # Multi-objective runs keep improving runtime/memory/size after reaching full fitness
+            if best.fitness == 1.0 and self.selection != "nsga2":
                 console.print("\n[bold green]*** Perfect solution found! ***[/bold green]")
-                if self.writer: self.writer.close()
+                self.tracer.add("generation", "phase", gen_start, time.perf_counter() - gen_start, generation=gen)
+                self._finish()
                 # We stop early if perfect
                 return best
             elif best.fitness == 0.0 and best.feedback:
                 console.print(f"\n[bold red]Best Solution Failed:[/bold red] {best.feedback}")
+
+            if self.budget_exhausted:
+                console.print("\n[bold yellow]LLM budget spent, stopping.[/bold yellow]")
+                self.tracer.add("generation", "phase", gen_start, time.perf_counter() - gen_start, generation=gen)
+                break
             
             # 4. Selection & Mutation (if not last gen)
             if gen < generations - 1:
-                with console.status("Creating next generation...", spinner="bouncingBall"):
-                    new_population = [self.population[0]] # Elitism
+                with console.status("Creating next generation...", spinner="bouncingBall"), \
+                        self.tracer.span("phase.mutate", "phase", generation=gen):
+                    if self.selection == "nsga2":
+                        # Parents compete with their children in the next environmental selection
+                        new_population = list(self.population)
+                        target = 2 * self.population_size
+                    else:
+                        new_population = [self.population[0]] # Elitism
+                        target = self.population_size
+                    # Children generated before an interruption come first
+                    new_population += self._pending_children[:target - len(new_population)]
+                    self._pending_children = []
                     
-                    # Fill the rest
+                    # Fill the rest, one batch of concurrent requests per round
                     attempts = 0 # Safety break
-                    while len(new_population) < self.population_size and attempts < self.population_size * 2:
-                        attempts += 1
-                        parent = self.population[len(new_population) % len(self.population)]
-                        mutation_prompt = self.task.mutation_prompt(parent.code, parent.feedback, parent.fitness)
-                        
-                        try:
-                            # Use a more open system prompt to allow for the reasoning/comments requested
-                            new_code = self.llm.generate(mutation_prompt, system_prompt="You are an expert Python evolutionary coder.")
-                            new_population.append(Individual(code=new_code))
-                        except Exception:
-                            pass 
+                    while len(new_population) < target and attempts < self.population_size * 2 \
+                            and not self.budget_exhausted:
+                        needed = min(target - len(new_population), self.population_size * 2 - attempts)
+                        attempts += needed
+                        parents = self.select_parents(-(-needed // self.children_per_call), offset=len(new_population))
+                        children = self.generate_children(parents, gen + 1)
+                        new_population.extend(children[:needed])
+                        # Surplus siblings seed the next generation
+                        self._pending_children.extend(children[needed:])
                     
                     self.population = new_population
+                    if self.run_log:
+                        self.run_log.checkpoint(gen + 1, self.population)
+            self.tracer.add("generation", "phase", gen_start, time.perf_counter() - gen_start, generation=gen)
 
+        self._finish()
+        return self.population[0] if self.population else None
+
+    def _finish(self):
+        """Close the TensorBoard writer and export the Chrome trace of the run."""
         if self.writer: self.writer.close()
+        if self.log_dir:
+            path = self.tracer.export_chrome(f"{self.log_dir}/trace.json")
+            console.print(f"[dim]Trace written to {path}[/dim]")
+
+    def _confirm_best(self):
+        """
+        Run reused individuals (dedup policy "reuse") once they reach the top of the population,
+        so a program that never ran cannot become the best, end the run or be saved.
+        """
+        while True:
+            with self._population_lock:
+                top = self.population[0] if self.population else None
+            if top is None or not top.reused:
+                return
+            self.evaluate_individuals([top], fresh=True)
+            if self.database is not None:
+                self.database.add(self.task.name, top)
+            if self.run_log:
+                self.run_log.log_evaluated(top)
+            with self._population_lock:
+                self.population.sort(key=lambda x: x.fitness, reverse=True)
+
+    def _tournament_parent(self, size: int = 3) -> Individual:
+        if self.selection == "map-elites":
+            parent = self.database.sample_parent(self.task.name)
+            if parent:
+                return parent
+        with self._population_lock:
+            if self.selection == "nsga2":
+                return crowded_tournament(self.population, 1)[0]
+            contestants = random.sample(self.population, min(size, len(self.population)))
+        return max(contestants, key=lambda x: x.fitness)
+
+    def _insert(self, child: Individual):
+        """Steady-state replacement: keep the best `population_size` individuals (by Pareto rank for nsga2)."""
+        with self._population_lock:
+            self.population.append(child)
+            if self.selection == "nsga2":
+                self.population = nsga2_select(self.population, self.population_size)
+            self.population.sort(key=lambda x: x.fitness, reverse=True)
+            del self.population[self.population_size:]
+
+    def run_steady_state(self, max_children: int = 20, queue_size: int = None) -> Optional[Individual]:
+        """
+        Run evolution as a producer/consumer pipeline without generation barriers.
+
+        `self.concurrency` generator threads keep sampling parents and asking the LLM for
+        children, feeding a bounded queue (generators block when evaluation falls behind).
+        The calling thread evaluates children as they arrive, in batches of up to the
+        evaluator's worker count, and inserts each into the population immediately.
+        Stops after `max_children` children or when a perfect solution is found.
+        """
+        if len(self.population) < self.population_size:
+            self.seed_population()
+        if not self.population:
+            return None
+
+        with console.status("Evaluating initial population...", spinner="dots"):
+            self.evaluate_individuals(self.population)
+        self.population.sort(key=lambda x: x.fitness, reverse=True)
+        self._confirm_best()
+        if self.database is not None:
+            for ind in self.population:
+                self.database.add(self.task.name, ind)
+
+        children: queue.Queue = queue.Queue(maxsize=queue_size or 2 * self.concurrency)
+        stop = threading.Event()
+        budget_lock = threading.Lock()
+        requested = [0]
+        evaluated = 0
+        batch_size = getattr(self.evaluator, "workers", 1)
+
+        def produce():
+            while not stop.is_set() and not self.budget_exhausted:
+                with budget_lock:
+                    if requested[0] >= max_children:
+                        return
+                    requested[0] += self.children_per_call
+                    generation = requested[0] // self.population_size + 1
+                parent = self._tournament_parent()
+                for child in self.generate_children([parent], generation):
+                    while not stop.is_set():
+                        try:
+                            children.put(child, timeout=0.1)
+                            break
+                        except queue.Full:
+                            continue
+
+        producers = [threading.Thread(target=produce, daemon=True) for _ in range(self.concurrency)]
+        for producer in producers:
+            producer.start()
+
+        start = time.perf_counter()
+        console.rule(f"[bold blue]Steady-state evolution ({max_children} children)[/bold blue]")
+        try:
+            while evaluated < max_children:
+                try:
+                    batch = [children.get(timeout=0.5)]
+                except queue.Empty:
+                    if not any(p.is_alive() for p in producers) and children.empty():
+                        break
+                    continue
+                while len(batch) < batch_size:
+                    try:
+                        batch.append(children.get_nowait())
+                    except queue.Empty:
+                        break
+
+                # A child only enters a full population if it beats the current worst
+                with self._population_lock:
+                    full = len(self.population) >= self.population_size and self.selection != "nsga2"
+                    threshold = self.population[-1].fitness if full else 0.0
+                with self.tracer.span("phase.evaluate", "phase", batch=len(batch)):
+                    self.evaluate_individuals(batch, threshold)
+                for child in batch:
+                    self._insert(child)
+                    # A partial score is no program's real fitness: keep it out of the archive and the log
+                    if child.partial:
+                        continue
+                    if self.database is not None:
+                        self.database.add(self.task.name, child)
+                    if self.run_log:
+                        self.run_log.log_evaluated(child)
+                evaluated += len(batch)
+                self._confirm_best()
+
+                elapsed = time.perf_counter() - start
+                throughput = evaluated / elapsed * 60 if elapsed > 0 else 0.0
+                best = self.population[0]
+                if self.writer:
+                    self.writer.add_scalar("Fitness/Best", best.fitness, evaluated)
+                    self.writer.add_scalar("Fitness/Avg",
+                                           sum(p.fitness for p in self.population) / len(self.population), evaluated)
+                    self.writer.add_scalar("Throughput/ChildrenPerMinute", throughput, evaluated)
+                    self.writer.add_scalar("Queue/Depth", children.qsize(), evaluated)
+                    for key, value in self.llm.stats().items():
+                        self.writer.add_scalar(f"LLM/{key}", value, evaluated)
+                    self.tracer.write_tensorboard(self.writer, evaluated)
+                console.print(f"[dim]{evaluated}/{max_children} children | best {best.fitness:.3f} | "
+                              f"{throughput:.1f} children/min | queue {children.qsize()}[/dim]")
+
+                if best.fitness == 1.0 and self.selection != "nsga2":
+                    console.print("\n[bold green]*** Perfect solution found! ***[/bold green]")
+                    break
+            if self.budget_exhausted:
+                console.print("\n[bold yellow]LLM budget spent, stopping.[/bold yellow]")
+        finally:
+            stop.set()
+            for producer in producers:
+                producer.join(timeout=1)
+
+        elapsed = time.perf_counter() - start
+        self.throughput = evaluated / elapsed * 60 if elapsed > 0 else 0.0
+        self.print_generation_summary(evaluated, max_children, title=f"Population after {evaluated} children")
+        if self.selection == "nsga2":
+            self.print_pareto_front()
+        console.print(f"[bold]Throughput: {self.throughput:.1f} children/minute[/bold]")
+        self.print_dedup_summary()
+        self._finish()
         return self.population[0] if self.population else None
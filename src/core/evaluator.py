@@ -0,0 +1,278 @@
+import os
+import time
+import signal
+import threading
+import _thread
+import tracemalloc
+import multiprocessing
+from multiprocessing.connection import wait
+from contextlib import contextmanager
+from typing import List, Optional
+from src.core.types import EvaluationResult
+from src.tasks.base import AbstractBaseTask
+from src.tasks.candidate import CandidateError
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class TimeoutException(Exception):
+    pass
+
+# Timeout context manager. signal.alarm is not available on Windows, so this uses a
+# thread that interrupts the main thread. It cannot stop code stuck inside a C call;
+# use ProcessEvaluator when that matters. Limits nest: only the limit whose timer fired
+# turns the interrupt into a TimeoutException, so an enclosing deadline is never mistaken
+# for an inner one (e.g. a stage budget running out during a per-call limit).
+@contextmanager
+def time_limit(seconds):
+    if seconds is None:
+        yield
+        return
+
+    fired = threading.Event()
+
+    def interrupt():
+        fired.set()
+        _thread.interrupt_main()
+
+    timer = threading.Timer(seconds, interrupt)
+    timer.start()
+    try:
+        yield
+    except KeyboardInterrupt:
+        if not fired.is_set():
+            raise
+        raise TimeoutException("Timed out!")
+    finally:
+        timer.cancel()
+
+
+def _reject(task: AbstractBaseTask, code: str) -> Optional[EvaluationResult]:
+    """Static pre-check: a result for candidates that must not be executed at all, else None."""
+    try:
+        task.prepare(code)
+    except CandidateError as e:
+        return EvaluationResult(feedback=f"Rejected before execution: {e}", stage="syntax")
+    return None
+
+
+def _timeout_for(task: AbstractBaseTask, timeout: Optional[float]) -> float:
+    """
+    A fixed evaluation timeout, or the task's calibrated budget when None (see AbstractBaseTask.stage_timeouts).
+
+    The stage limits are calibrated here either way, before any timer starts or process is
+    forked, so the reference solution never runs inside a candidate's timed region.
+    """
+    budget = task.evaluation_timeout()
+    return timeout if timeout is not None else budget
+
+
+def _as_result(score) -> EvaluationResult:
+    """Tasks return either a plain fitness or an EvaluationResult carrying feedback."""
+    if isinstance(score, EvaluationResult):
+        return EvaluationResult(fitness=float(score.fitness), feedback=score.feedback, stage=score.stage,
+                                partial=score.partial)
+    return EvaluationResult(fitness=float(score))
+
+
+class InlineEvaluator:
+    """Evaluates candidates one by one inside the engine process."""
+
+    def __init__(self, timeout: float = None, track_memory: bool = False):
+        self.timeout = timeout
+        # Measure peak allocations with tracemalloc, in a second pass after the timed one
+        # (tracing slows allocation-heavy code down, which would skew timing-based scores)
+        self.track_memory = track_memory
+
+    def evaluate(self, task: AbstractBaseTask, code: str, threshold: float = 0.0) -> EvaluationResult:
+        rejected = _reject(task, code)
+        if rejected:
+            return rejected
+        timeout = _timeout_for(task, self.timeout)
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        try:
+            with time_limit(timeout):
+                result = _as_result(task.run_evaluation(code, threshold))
+        except TimeoutException:
+            result = EvaluationResult(feedback=f"Execution Timed Out (>{timeout:.2f}s)")
+        except Exception as e:
+            result = EvaluationResult(feedback=str(e))
+        result.started = start
+        result.duration = time.perf_counter() - start
+        result.cpu_time = time.process_time() - cpu_start
+        # Broken programs are dominated anyway, so only working ones pay for the memory pass
+        if self.track_memory and result.fitness > 0 and not tracemalloc.is_tracing():
+            result.peak_memory_kb = self._peak_memory_kb(task, code, threshold, timeout)
+        return result
+
+    def _peak_memory_kb(self, task: AbstractBaseTask, code: str, threshold: float, timeout: float) -> float:
+        """Peak traced allocations of a second, untimed run (its score is discarded)."""
+        tracemalloc.start()
+        try:
+            with time_limit(timeout):
+                task.run_evaluation(code, threshold)
+        except Exception:
+            pass  # the peak up to the failure or timeout still counts
+        finally:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        return peak / 1024
+
+    def evaluate_batch(self, task: AbstractBaseTask, codes: List[str], threshold: float = 0.0) -> List[EvaluationResult]:
+        return [self.evaluate(task, code, threshold) for code in codes]
+
+
+def _apply_limits(cpu_seconds: Optional[float], memory_mb: Optional[int]):
+    if resource is None:
+        return
+    if cpu_seconds:
+        soft = max(1, int(cpu_seconds + 0.999))
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, soft + 1))
+    if memory_mb:
+        limit = int(memory_mb) * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _evaluate_in_child(task: AbstractBaseTask, code: str, threshold: float, conn, cpu_seconds, memory_mb):
+    """Entry point of an evaluation process: apply limits, evaluate, send the EvaluationResult."""
+    # Peak RSS before the candidate runs, so only its own growth is reported
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource is not None else 0
+    try:
+        _apply_limits(cpu_seconds, memory_mb)
+        result = _as_result(task.run_evaluation(code, threshold))
+    except MemoryError:
+        result = EvaluationResult(feedback=f"Memory limit exceeded (>{memory_mb} MB)")
+    except BaseException as e:
+        result = EvaluationResult(feedback=str(e) or type(e).__name__)
+    try:
+        if resource is not None:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            result.cpu_time = usage.ru_utime + usage.ru_stime
+            result.peak_memory_kb = max(0, usage.ru_maxrss - baseline_kb)
+        conn.send(result)
+    finally:
+        conn.close()
+
+
+class ProcessEvaluator:
+    """
+    Evaluates each candidate in its own OS process, `workers` at a time.
+
+    A candidate that exceeds the wall-clock timeout is killed, even if it is stuck in C code.
+    CPU time and address space are capped with rlimits (Unix only), so a runaway candidate
+    can only take down its own process, never the engine. Without a `timeout` each task's
+    calibrated budget is used.
+
+    Candidates of timing-sensitive tasks run one at a time: their scores compare against
+    baselines timed on an idle machine, which candidates competing for CPU would not match.
+    """
+
+    def __init__(self, timeout: float = None, workers: int = None, cpu_limit: float = None,
+                 memory_limit_mb: int = 1024):
+        self.timeout = timeout
+        self.workers = max(1, workers or os.cpu_count() or 1)
+        # Fixed CPU budget; by default the wall-clock budget plus a little slack
+        self.cpu_limit = cpu_limit
+        self.memory_limit_mb = memory_limit_mb
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        self._ctx = multiprocessing.get_context(method)
+
+    def evaluate(self, task: AbstractBaseTask, code: str, threshold: float = 0.0) -> EvaluationResult:
+        return self.evaluate_batch(task, [code], threshold)[0]
+
+    def _start(self, task: AbstractBaseTask, code: str, threshold: float, cpu_limit: float):
+        recv_conn, send_conn = self._ctx.Pipe(duplex=False)
+        proc = self._ctx.Process(
+            target=_evaluate_in_child,
+            args=(task, code, threshold, send_conn, cpu_limit, self.memory_limit_mb),
+            daemon=True
+        )
+        proc.start()
+        send_conn.close()
+        return proc, recv_conn
+
+    def evaluate_batch(self, task: AbstractBaseTask, codes: List[str], threshold: float = 0.0) -> List[EvaluationResult]:
+        # Rejected candidates never cost a process; valid ones are compiled here, before
+        # forking, so children inherit the code objects
+        results: List[Optional[EvaluationResult]] = [_reject(task, code) for code in codes]
+        pending = [i for i, result in enumerate(results) if result is None]
+        running = {}  # index -> (proc, conn, start time)
+        # Calibrated here (once per task), so children inherit the stage limits
+        timeout = _timeout_for(task, self.timeout) if pending else None
+        cpu_limit = self.cpu_limit if self.cpu_limit is not None else (timeout + 1 if timeout else None)
+        workers = 1 if task.timing_sensitive else self.workers
+
+        while pending or running:
+            while pending and len(running) < workers:
+                i = pending.pop(0)
+                proc, conn = self._start(task, codes[i], threshold, cpu_limit)
+                running[i] = (proc, conn, time.perf_counter())
+
+            # Wait for a result, a dead process, or the nearest deadline
+            now = time.perf_counter()
+            wait_for = None
+            if timeout:
+                wait_for = max(0.0, min(start + timeout for _, _, start in running.values()) - now)
+            waitables = [conn for _, conn, _ in running.values()] + [proc.sentinel for proc, _, _ in running.values()]
+            wait(waitables, timeout=wait_for)
+
+            now = time.perf_counter()
+            for i, (proc, conn, start) in list(running.items()):
+                result = None
+                if conn.poll():
+                    try:
+                        result = conn.recv()
+                        result.duration = now - start
+                    except (EOFError, OSError):
+                        pass
+                if result is None and not proc.is_alive():
+                    result = EvaluationResult(
+                        feedback=self._describe_exit(proc.exitcode, cpu_limit), duration=now - start
+                    )
+                if result is None and timeout and now - start >= timeout:
+                    proc.kill()
+                    result = EvaluationResult(feedback=f"Execution Timed Out (>{timeout:.2f}s)", duration=now - start)
+                if result is not None:
+                    result.started = start
+                    results[i] = result
+                    conn.close()
+                    proc.join(timeout=1)
+                    if proc.is_alive():
+                        proc.kill()
+                        proc.join()
+                    del running[i]
+
+        return results
+
+    def _describe_exit(self, exitcode: Optional[int], cpu_limit: Optional[float]) -> str:
+        if hasattr(signal, "SIGXCPU") and exitcode == -signal.SIGXCPU:
+            return f"CPU time limit exceeded (>{cpu_limit:.2f}s)"
+        if exitcode is not None and exitcode < 0:
+            return f"Evaluator process killed by signal {-exitcode}"
+        return f"Evaluator process exited unexpectedly (exit code {exitcode})"
+
+
+def create_evaluator(kind: str = "inline", timeout: float = None, workers: int = None,
+                     memory_limit_mb: int = 1024, track_memory: bool = False, queue_path: str = None,
+                     task_name: str = None, task_options: dict = None):
+    """
+    Build an evaluation backend by name ("inline", "process" or "queue"). Without a `timeout`
+    each task's calibrated budget applies. Process evaluation always reports peak memory;
+    inline evaluation only with `track_memory` (tracemalloc).
+    "queue" hands candidates to `main.py worker` processes through the SQLite job queue at
+    `queue_path`; the workers rebuild the task from `task_name` and `task_options`.
+    """
+    if kind == "inline":
+        return InlineEvaluator(timeout=timeout, track_memory=track_memory)
+    if kind == "process":
+        return ProcessEvaluator(timeout=timeout, workers=workers, memory_limit_mb=memory_limit_mb)
+    if kind == "queue":
+        from src.core.jobqueue import DEFAULT_QUEUE_PATH, QueueEvaluator
+        if not task_name:
+            raise ValueError("The queue evaluator needs the registered task name")
+        return QueueEvaluator(task_name, task_options, path=queue_path or DEFAULT_QUEUE_PATH, workers=workers or 4)
+    raise ValueError(f"Unknown evaluator: {kind}")
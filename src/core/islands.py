@@ -0,0 +1,144 @@
+import multiprocessing
+import queue
+from dataclasses import dataclass, field
+from typing import List, Optional
+from rich.console import Console
+from src.core.types import Individual
+from src.tasks.base import AbstractBaseTask
+
+console = Console()
+
+TOPOLOGIES = ("ring", "full")
+
+
+def migration_targets(island: int, num_islands: int, topology: str = "ring") -> List[int]:
+    """Islands that receive migrants from `island`."""
+    if num_islands < 2:
+        return []
+    if topology == "ring":
+        return [(island + 1) % num_islands]
+    if topology == "full":
+        return [i for i in range(num_islands) if i != island]
+    raise ValueError(f"Unknown migration topology: {topology} (expected one of {', '.join(TOPOLOGIES)})")
+
+
+@dataclass
+class IslandConfig:
+    """Everything an island process needs to build its own LLM, evaluator and engine."""
+    task: AbstractBaseTask
+    model: str
+    population_size: int = 5
+    generations: int = 3
+    log_dir: Optional[str] = None
+    migration_interval: int = 1
+    migration_size: int = 1
+    topology: str = "ring"
+    llm_options: dict = field(default_factory=dict)
+    evaluator_options: dict = field(default_factory=dict)
+    engine_options: dict = field(default_factory=dict)
+
+
+def _island_main(index: int, config: IslandConfig, inboxes, results):
+    # Imported here so the parent process does not pay for engine setup it never uses
+    from src.core import engine as engine_module
+    from src.core.engine import EvolutionEngine
+    from src.core.evaluator import create_evaluator
+    from src.core.llm import create_provider
+    from src.core.response_cache import ResponseCache
+
+    # Migration is best effort: never block process exit on undelivered migrants
+    for inbox in inboxes:
+        inbox.cancel_join_thread()
+
+    # Islands run side by side; only print one status line per generation
+    engine_module.console.quiet = True
+
+    llm_options = dict(config.llm_options)
+    cache_path = llm_options.pop("cache_path", None)
+    cache_size = llm_options.pop("cache_size", 10000)
+    if cache_path:
+        llm_options["cache"] = ResponseCache(cache_path, max_entries=cache_size, namespace=f"island{index}:")
+    llm = create_provider(config.model, task=config.task, **llm_options)
+
+    log_dir = f"{config.log_dir}/island_{index}" if config.log_dir else None
+    engine = EvolutionEngine(
+        llm=llm, task=config.task, population_size=config.population_size, log_dir=log_dir,
+        evaluator=create_evaluator(**config.evaluator_options), **config.engine_options
+    )
+    targets = migration_targets(index, len(inboxes), config.topology)
+
+    def migrate(gen: int, engine: EvolutionEngine):
+        # Absorb whatever has arrived, then emigrate on the configured interval
+        immigrants = []
+        while True:
+            try:
+                code, fitness, feedback = inboxes[index].get_nowait()
+            except queue.Empty:
+                break
+            immigrants.append(Individual(code=code, fitness=fitness, feedback=feedback))
+        if immigrants:
+            engine.add_immigrants(immigrants)
+
+        if (gen + 1) % config.migration_interval == 0:
+            for ind in engine.population[:config.migration_size]:
+                for target in targets:
+                    inboxes[target].put((ind.code, ind.fitness, ind.feedback))
+
+        best = engine.population[0] if engine.population else None
+        console.print(f"[cyan]Island {index}[/cyan] gen {gen + 1}/{config.generations}: "
+                      f"best {best.fitness if best else 0.0:.3f}, {len(immigrants)} immigrants")
+
+    try:
+        best = engine.run(generations=config.generations, on_generation=migrate)
+        results.put((index, (best.code, best.fitness, best.feedback) if best else None, None))
+    except Exception as e:
+        results.put((index, None, str(e)))
+
+
+class IslandRunner:
+    """
+    Runs K independent engines in separate processes, exchanging their top individuals
+    every `migration_interval` generations over a ring or fully connected topology.
+    """
+
+    def __init__(self, config: IslandConfig, num_islands: int = 4):
+        if config.topology not in TOPOLOGIES:
+            raise ValueError(f"Unknown migration topology: {config.topology} (expected one of {', '.join(TOPOLOGIES)})")
+        self.config = config
+        self.num_islands = max(1, num_islands)
+        method = "fork" if "fork" in multiprocessing.get_all_start_methods() else "spawn"
+        self._ctx = multiprocessing.get_context(method)
+
+    def run(self) -> Optional[Individual]:
+        inboxes = [self._ctx.Queue() for _ in range(self.num_islands)]
+        results = self._ctx.Queue()
+        processes = [
+            self._ctx.Process(target=_island_main, args=(i, self.config, inboxes, results))
+            for i in range(self.num_islands)
+        ]
+        for proc in processes:
+            proc.start()
+
+        # Collect before joining so a full results pipe can never deadlock the children
+        bests: List[Individual] = []
+        received = 0
+        while received < self.num_islands:
+            try:
+                index, best, error = results.get(timeout=1)
+            except queue.Empty:
+                if not any(proc.is_alive() for proc in processes):
+                    console.print("[red]Some islands exited without reporting a result.[/red]")
+                    break
+                continue
+            received += 1
+            if error:
+                console.print(f"[red]Island {index} failed: {error}[/red]")
+            elif best:
+                code, fitness, feedback = best
+                bests.append(Individual(code=code, fitness=fitness, feedback=feedback))
+
+        for proc in processes:
+            proc.join()
+
+        bests.sort(key=lambda x: x.fitness, reverse=True)
+        return bests[0] if bests else None
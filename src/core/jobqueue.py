@@ -0,0 +1,326 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+from src.core.types import EvaluationResult
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+DEFAULT_QUEUE_PATH = ".cache/jobs.sqlite"
+
+
+@dataclass
+class Job:
+    id: int
+    task: str
+    task_options: dict
+    code: str
+    threshold: float
+    attempts: int
+
+
+class JobQueue:
+    """
+    Evaluation jobs shared between the engine and any number of workers through a SQLite
+    file (WAL mode, so readers and the single writer at a time don't block each other).
+    WAL relies on shared memory, so every process must run on the same host and the file
+    must be on a local disk, not a network filesystem.
+
+    A worker leases a job for `lease_seconds` and keeps extending the lease while it
+    evaluates. If the worker dies the lease runs out and the job goes to the next worker;
+    after `max_attempts` expired leases the job is failed instead.
+    """
+
+    def __init__(self, path: str = DEFAULT_QUEUE_PATH, max_attempts: int = 3):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        # Switching to WAL ignores the busy timeout, so workers starting together on a new file retry
+        for attempt in range(50):
+            try:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+                break
+            except sqlite3.OperationalError:
+                if attempt == 49:
+                    raise
+                time.sleep(0.1)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                task TEXT NOT NULL,
+                task_options TEXT NOT NULL,
+                code TEXT NOT NULL,
+                threshold REAL NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                result TEXT,
+                created REAL,
+                finished REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, id);
+        """)
+
+    def submit(self, task: str, task_options: dict, codes: List[str], threshold: float = 0.0) -> List[int]:
+        now = time.time()
+        options = json.dumps(task_options or {}, sort_keys=True)
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            ids = [
+                self._conn.execute(
+                    "INSERT INTO jobs (task, task_options, code, threshold, created) VALUES (?, ?, ?, ?, ?)",
+                    (task, options, code, threshold, now)
+                ).lastrowid
+                for code in codes
+            ]
+            self._conn.execute("COMMIT")
+        return ids
+
+    def lease(self, worker: str, lease_seconds: float = 30.0) -> Optional[Job]:
+        """Take the oldest pending job, or one whose lease expired (its worker is presumed dead)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Jobs that already burned through their attempts are failed, not re-dispatched
+                self._fail_abandoned(now)
+                row = self._conn.execute(
+                    "SELECT id, task, task_options, code, threshold, attempts FROM jobs "
+                    "WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?) ORDER BY id LIMIT 1",
+                    (now,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1 "
+                    "WHERE id = ?",
+                    (worker, now + lease_seconds, row[0])
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return Job(id=row[0], task=row[1], task_options=json.loads(row[2]), code=row[3], threshold=row[4],
+                   attempts=row[5] + 1)
+
+    def _fail_abandoned(self, now: float):
+        self._conn.execute(
+            "UPDATE jobs SET status = 'done', finished = ?, result = ? "
+            "WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?",
+            (now, json.dumps(asdict(EvaluationResult(
+                feedback=f"Evaluation abandoned after {self.max_attempts} expired leases (worker died?)"
+            ))), now, self.max_attempts)
+        )
+
+    def fail_expired(self):
+        """Fail expired jobs that used up their attempts, without waiting for a worker to lease again."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._fail_abandoned(time.time())
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def heartbeat(self, job_id: int, worker: str, lease_seconds: float = 30.0) -> bool:
+        """Extend a lease; False if the job was meanwhile re-dispatched or finished."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND worker = ? AND status = 'leased'",
+                (time.time() + lease_seconds, job_id, worker)
+            )
+        return cursor.rowcount > 0
+
+    def complete(self, job_id: int, worker: str, result: EvaluationResult) -> bool:
+        """Store a result. The first result wins if a re-dispatched job finishes twice."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'done', result = ?, finished = ?, worker = ? "
+                "WHERE id = ? AND status != 'done'",
+                (json.dumps(asdict(result)), time.time(), worker, job_id)
+            )
+        return cursor.rowcount > 0
+
+    def results(self, ids: List[int]) -> Dict[int, EvaluationResult]:
+        """Finished results among `ids`."""
+        if not ids:
+            return {}
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, result FROM jobs WHERE status = 'done' AND id IN ({placeholders})", ids
+            ).fetchall()
+        return {job_id: EvaluationResult(**json.loads(result)) for job_id, result in rows}
+
+    def live(self, ids: List[int]) -> int:
+        """How many of `ids` are held by a worker right now (leased, lease not yet expired)."""
+        if not ids:
+            return 0
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            return self._conn.execute(
+                f"SELECT COUNT(*) FROM jobs WHERE status = 'leased' AND lease_expires >= ? AND id IN ({placeholders})",
+                (time.time(), *ids)
+            ).fetchone()[0]
+
+    def delete(self, ids: List[int]):
+        if not ids:
+            return
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            self._conn.execute(f"DELETE FROM jobs WHERE id IN ({placeholders})", ids)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    def close(self):
+        self._conn.close()
+
+
+class QueueEvaluator:
+    """
+    Evaluation backend that hands candidates to `main.py worker` processes through a JobQueue
+    and waits for their results. The workers must run on this host (see JobQueue).
+    """
+
+    def __init__(self, task_name: str, task_options: dict = None, path: str = DEFAULT_QUEUE_PATH,
+                 workers: int = 4, poll_interval: float = 0.05, dispatch_timeout: float = 60.0,
+                 max_attempts: int = 3):
+        self.task_name = task_name
+        self.task_options = task_options or {}
+        self.queue = JobQueue(path, max_attempts=max_attempts)
+        # Expected number of workers (steady-state mode batches this many candidates)
+        self.workers = max(1, workers or 1)
+        self.poll_interval = poll_interval
+        # Give up on a batch once none of its jobs has been held by a live worker for this long
+        # (no worker running, or every worker died and nobody re-leased the jobs)
+        self.dispatch_timeout = dispatch_timeout
+
+    def evaluate(self, task, code: str, threshold: float = 0.0) -> EvaluationResult:
+        return self.evaluate_batch(task, [code], threshold)[0]
+
+    def evaluate_batch(self, task, codes: List[str], threshold: float = 0.0) -> List[EvaluationResult]:
+        ids = self.queue.submit(self.task_name, self.task_options, codes, threshold)
+        stalled_since = time.perf_counter()
+        results = {}
+        while len(results) < len(ids):
+            for i, result in self.queue.results([i for i in ids if i not in results]).items():
+                # The worker's clock is not ours; the result just finished (within a poll interval)
+                result.started = time.perf_counter() - result.duration
+                results[i] = result
+            if len(results) == len(ids):
+                break
+            unfinished = [i for i in ids if i not in results]
+            now = time.perf_counter()
+            if self.queue.live(unfinished):
+                stalled_since = now
+            elif now - stalled_since > self.dispatch_timeout:
+                for i in unfinished:
+                    results[i] = EvaluationResult(
+                        feedback=f"No live evaluation worker held the job for {self.dispatch_timeout}s"
+                    )
+                break
+            else:
+                # No worker may be left to lease (and so fail) jobs that used up their attempts
+                self.queue.fail_expired()
+            time.sleep(self.poll_interval)
+        self.queue.delete(ids)
+        return [results[i] for i in ids]
+
+
+@contextmanager
+def _host_lock(path: str):
+    """Exclusive lock shared by all workers of the queue at `path` on this host (no-op without fcntl)."""
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def run_worker(path: str = DEFAULT_QUEUE_PATH, worker_id: str = None, lease_seconds: float = 30.0,
+               poll_interval: float = 0.2, evaluator_options: dict = None, idle_exit: float = None,
+               max_jobs: int = None) -> int:
+    """
+    Pull jobs until stopped (or idle for `idle_exit` seconds / after `max_jobs`), evaluate each
+    with a local evaluator and post the result. Returns the number of jobs completed.
+
+    Jobs of timing-sensitive tasks are evaluated one at a time across all workers of the
+    queue, like ProcessEvaluator does: their scores compare against baselines timed on an
+    idle machine.
+    """
+    from src.core.evaluator import create_evaluator
+    from src.tasks.registry import get_task
+
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+    queue = JobQueue(path)
+    evaluator = create_evaluator(**(evaluator_options or {}))
+    tasks = {}
+    done = 0
+    idle_since = time.time()
+
+    while max_jobs is None or done < max_jobs:
+        job = queue.lease(worker_id, lease_seconds)
+        if job is None:
+            if idle_exit is not None and time.time() - idle_since > idle_exit:
+                break
+            time.sleep(poll_interval)
+            continue
+
+        key = (job.task, json.dumps(job.task_options, sort_keys=True))
+        if key not in tasks:
+            try:
+                tasks[key] = get_task(job.task, **job.task_options)
+            except Exception as e:
+                # Every worker would fail the same way, so fail the job rather than the worker
+                tasks[key] = e
+        task = tasks[key]
+
+        # Keep the lease alive while evaluating
+        stop = threading.Event()
+
+        def beat():
+            while not stop.wait(lease_seconds / 3):
+                if not queue.heartbeat(job.id, worker_id, lease_seconds):
+                    return
+
+        heart = threading.Thread(target=beat, daemon=True)
+        heart.start()
+        try:
+            if task is None:
+                result = EvaluationResult(feedback=f"Unknown task on worker {worker_id}: {job.task}")
+            elif isinstance(task, Exception):
+                result = EvaluationResult(feedback=f"Could not build task {job.task} on worker {worker_id}: {task}")
+            elif task.timing_sensitive:
+                with _host_lock(f"{path}.timed.lock"):
+                    result = evaluator.evaluate(task, job.code, job.threshold)
+            else:
+                result = evaluator.evaluate(task, job.code, job.threshold)
+        finally:
+            stop.set()
+            heart.join()
+        queue.complete(job.id, worker_id, result)
+        done += 1
+        idle_since = time.time()
+
+    queue.close()
+    return done
@@ -1,13 +1,135 @@
-import litellm
+import json
 import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from typing import Callable, List, Optional, Union
 from dotenv import load_dotenv
-from tenacity import retry, stop_after_attempt, wait_exponential
+from tenacity import retry, wait_exponential
+from src.core.response_cache import ResponseCache, CacheMissError
 
 load_dotenv()
 
 
-class LLMProvider:
-    def __init__(self, model_name: str = "ollama/gemma3:4b", api_key: str = None):
+def _note_retry(retry_state):
+    """tenacity hook: count retries of the current call for tracing."""
+    provider = retry_state.args[0]
+    provider._local.retries = getattr(provider._local, "retries", 0) + 1
+
+
+def _attempts_spent(retry_state) -> bool:
+    """tenacity stop condition: the provider's `max_attempts` are used up."""
+    return retry_state.attempt_number >= retry_state.args[0].max_attempts
+
+
+# Separator line between programs when several are requested in one completion. It is a
+# Python comment, so an unsplit response still parses.
+PROGRAM_DELIMITER_RE = re.compile(r"^[ \t]*###[ \t]*PROGRAM[ \t]*\d*[ \t]*###[ \t]*$", re.MULTILINE)
+
+_usage_lock = threading.Lock()
+
+
+def estimate_tokens(*texts: str) -> int:
+    """Rough token count (~4 characters per token) for when the provider reports no usage."""
+    return max(1, sum(len(t or "") for t in texts) // 4)
+
+
+def batch_prompt(prompt: str, n: int) -> str:
+    """Ask for `n` alternative answers to `prompt` in one completion, separated by delimiter lines."""
+    return (f"{prompt}\n\nReturn {n} DIFFERENT candidate answers to the above. Put a line containing exactly "
+            f"'### PROGRAM k ###' (k = 1..{n}) before each one, and nothing else between them.")
+
+
+def split_programs(text: str, n: int) -> List[str]:
+    """Split a delimited multi-program completion; an undelimited response is one program."""
+    parts = PROGRAM_DELIMITER_RE.split(text)
+    # Anything before the first delimiter is preamble
+    parts = [part.strip() for part in (parts[1:] if len(parts) > 1 else parts)]
+    return [part for part in parts if part][:n] or [text]
+
+
+class BaseLLMProvider(ABC):
+    """Interface the engine talks to. Implementations only need `generate`."""
+    model_name: str = ""
+    # Optional src.core.tracing.Tracer receiving one span per call (set by the engine)
+    tracer = None
+
+    @abstractmethod
+    def generate(self, prompt: str, system_prompt: str = None) -> str:
+        pass
+
+    def generate_batch(self, prompt: str, n: int, system_prompt: str = None) -> List[str]:
+        """
+        Up to `n` completions of one prompt for the cost of one prefill. The default asks
+        for `n` delimited programs in a single completion and splits them, so it may
+        return fewer than `n` if the model does not follow the format.
+        """
+        if n <= 1:
+            return [self.generate(prompt, system_prompt=system_prompt)]
+        return split_programs(self.generate(batch_prompt(prompt, n), system_prompt=system_prompt), n)
+
+    def last_usage(self) -> Optional[dict]:
+        """Token usage ({"prompt_tokens", "completion_tokens"}) of this thread's last call, if known."""
+        return None
+
+    def cached(self, prompt: str, system_prompt: str = None, n: int = 1) -> Optional[List[str]]:
+        """
+        The responses `generate` (n=1) or `generate_batch` would serve from a response cache
+        without calling the model, else None. Lets a scheduler skip admission for them.
+        """
+        return None
+
+    def stats(self) -> dict:
+        """Numeric provider statistics worth logging (e.g. queue depth of a scheduler)."""
+        return {}
+
+    def generate_many(self, prompts: List[str], system_prompt: str = None, max_concurrency: int = 1,
+                      on_result: Callable[[int, Union[str, List[str], Exception]], None] = None, n: int = 1,
+                      usage: Counter = None) -> List[Union[str, List[str], Exception]]:
+        """
+        Generate a completion for each prompt, keeping at most `max_concurrency` requests in flight.
+
+        Each request goes through `generate`, so the retry policy applies per request.
+        Results are returned in prompt order; a request that still fails after its retries
+        yields the exception instead of a string. `on_result(index, result)` is called as
+        soon as each request finishes, e.g. to log it before the whole batch is done.
+
+        With `n > 1` each request goes through `generate_batch` and yields a list of strings.
+        If `usage` is given, successful requests add to its "calls" and "tokens" counts.
+        """
+        def _call(index):
+            try:
+                if n > 1:
+                    result = self.generate_batch(prompts[index], n, system_prompt=system_prompt)
+                else:
+                    result = self.generate(prompts[index], system_prompt=system_prompt)
+                if usage is not None:
+                    last = self.last_usage()
+                    outputs = result if isinstance(result, list) else [result]
+                    tokens = (last["prompt_tokens"] + last["completion_tokens"] if last
+                              else estimate_tokens(prompts[index], system_prompt) + estimate_tokens(*outputs))
+                    with _usage_lock:
+                        usage["calls"] += 1
+                        usage["tokens"] += tokens
+            except Exception as e:
+                result = e
+            if on_result:
+                on_result(index, result)
+            return result
+
+        if max_concurrency <= 1 or len(prompts) <= 1:
+            return [_call(i) for i in range(len(prompts))]
+
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(prompts))) as pool:
+            return list(pool.map(_call, range(len(prompts))))
+
+
+class LLMProvider(BaseLLMProvider):
+    def __init__(self, model_name: str = "ollama/gemma3:4b", api_key: str = None, temperature: float = None,
+                 cache: ResponseCache = None, replay: bool = False):
         """
         Initialize the LLM provider.
         
@@ -17,32 +139,169 @@ class LLMProvider:
                         - "ollama/llama3" for local Ollama
                         - "gemini/gemini-2.0-flash" for Google Gemini
             api_key: Optional API key. If not provided, litellm will look for env vars.
+            temperature: Optional sampling temperature passed to the model.
+            cache: Optional on-disk response cache. Responses are served from it when present.
+            replay: Serve only from the cache; a missing entry raises CacheMissError.
         """
         self.model_name = model_name
         self.api_key = api_key
+        self.sampling_params = {"temperature": temperature} if temperature is not None else {}
+        self.cache = cache
+        self.replay = replay
+        # Attempts per request, with exponential backoff in between (an LLMScheduler sets this
+        # to 1 and retries itself, so that every attempt is admitted and charged)
+        self.max_attempts = 3
+        # Per-thread usage/retry info of the current call, for tracing
+        self._local = threading.local()
+        if replay and cache is None:
+            raise ValueError("Replay mode requires a response cache")
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=1, min=1, max=10))
     def generate(self, prompt: str, system_prompt: str = None) -> str:
         """
-        Generate text from the LLM.
+        Generate text from the LLM, going through the response cache if one is configured.
         """
+        return self._traced(lambda: self._generate(prompt, system_prompt, 1)[0])
+
+    def generate_batch(self, prompt: str, n: int, system_prompt: str = None) -> List[str]:
+        """`n` choices from one request where the model supports the `n` parameter, else delimited programs."""
+        if n > 1 and self.supports_n:
+            return self._traced(lambda: self._generate(prompt, system_prompt, n), choices=n)
+        return super().generate_batch(prompt, n, system_prompt=system_prompt)
+
+    @property
+    def supports_n(self) -> bool:
+        import litellm
+        try:
+            return "n" in (litellm.get_supported_openai_params(model=self.model_name) or [])
+        except Exception:
+            return False
+
+    def _traced(self, call: Callable, **span_args):
+        self._local.usage = None
+        self._local.retries = 0
+        self._local.cached = False
+        if self.tracer is None:
+            return call()
+
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            return call()
+        except Exception as e:
+            outcome = type(e).__name__
+            raise
+        finally:
+            usage = self._local.usage or {}
+            self.tracer.add("llm.generate", "llm", start, time.perf_counter() - start,
+                            prompt_tokens=usage.get("prompt_tokens", 0),
+                            completion_tokens=usage.get("completion_tokens", 0),
+                            retries=self._local.retries, cached=self._local.cached, outcome=outcome, **span_args)
+
+    def last_usage(self) -> Optional[dict]:
+        return getattr(self._local, "usage", None)
+
+    def _request_key(self, prompt: str, system_prompt: Optional[str], n: int) -> str:
+        params = dict(self.sampling_params, n=n) if n > 1 else self.sampling_params
+        return ResponseCache.request_key(self.model_name, system_prompt, prompt, params)
+
+    def cached(self, prompt: str, system_prompt: str = None, n: int = 1) -> Optional[List[str]]:
+        if self.cache is None:
+            return None
+        if n > 1 and not self.supports_n:
+            # generate_batch falls back to one delimited completion
+            hit = self.cached(batch_prompt(prompt, n), system_prompt)
+            return split_programs(hit[0], n) if hit else None
+        cached = self.cache.take(self._request_key(prompt, system_prompt, n))
+        if cached is None:
+            if self.replay:
+                raise CacheMissError(f"No cached response for this request (replay mode, model {self.model_name})")
+            return None
+
+        def hit():
+            self._local.cached = True
+            return json.loads(cached) if n > 1 else [cached]
+        return self._traced(hit, **({"choices": n} if n > 1 else {}))
+
+    def _generate(self, prompt: str, system_prompt: str = None, n: int = 1) -> List[str]:
+        if self.cache is None:
+            return self._complete(prompt, system_prompt, n)
+
+        # Single completions are cached as plain text, multi-choice ones as a JSON list
+        request_key = self._request_key(prompt, system_prompt, n)
+        failed = getattr(self._local, "failed", None)
+        # A retry of a failed request (by an LLMScheduler) keeps its sample index, so the
+        # response is cached where a replay will look for it
+        key = failed[1] if failed and failed[0] == request_key else self.cache.next_key(request_key)
+        self._local.failed = None
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._local.cached = True
+            return json.loads(cached) if n > 1 else [cached]
+        if self.replay:
+            raise CacheMissError(f"No cached response for this request (replay mode, model {self.model_name})")
+
+        try:
+            responses = self._complete(prompt, system_prompt, n)
+        except Exception:
+            self._local.failed = (request_key, key)
+            raise
+        self.cache.put(key, json.dumps(responses) if n > 1 else responses[0])
+        return responses
+
+    @retry(stop=_attempts_spent, wait=wait_exponential(multiplier=1, min=1, max=10), before_sleep=_note_retry,
+           reraise=True)
+    def _complete(self, prompt: str, system_prompt: str = None, n: int = 1) -> List[str]:
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
         
         messages.append({"role": "user", "content": prompt})
 
+        # litellm takes seconds to import, so only pay for it once a real model is called
+        import litellm
         try:
             response = litellm.completion(
                 model=self.model_name,
                 messages=messages,
-                api_key=self.api_key
+                api_key=self.api_key,
+                **(dict(self.sampling_params, n=n) if n > 1 else self.sampling_params)
             )
-            return response.choices[0].message.content
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                self._local.usage = {
+                    "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+                    "completion_tokens": getattr(usage, "completion_tokens", 0) or 0
+                }
+            return [choice.message.content for choice in response.choices]
         except Exception as e:
             print(f"Error generating response: {e}")
             raise
 
+
+def create_provider(model_name: str, task=None, **options) -> BaseLLMProvider:
+    """
+    Build a provider from a model name. "mock" (optionally "mock/<anything>") selects the
+    offline MockLLMProvider serving the task's reference programs; anything else goes to litellm.
+    Rate limits, budgets or `adaptive=True` wrap the provider in an LLMScheduler.
+    """
+    if model_name == "mock" or model_name.startswith("mock/"):
+        from src.core.mock_llm import MockLLMProvider
+        mock_options = {k: options[k] for k in ("latency", "tokens_per_second", "seed") if k in options}
+        corpus = task.reference_solutions() if task else []
+        provider = MockLLMProvider(corpus=corpus, model_name=model_name, **mock_options)
+    else:
+        llm_options = {k: options[k] for k in ("api_key", "temperature", "cache", "replay") if k in options}
+        provider = LLMProvider(model_name=model_name, **llm_options)
+
+    # Rate limits / budgets / adaptive concurrency put a scheduler in front of the provider
+    scheduler_options = {k: options[k] for k in ("requests_per_minute", "tokens_per_minute", "max_requests",
+                                                 "max_tokens") if options.get(k) is not None}
+    if scheduler_options or options.get("adaptive"):
+        from src.core.scheduler import LLMScheduler
+        return LLMScheduler(provider, max_concurrency=options.get("max_concurrency") or 16,
+                            adaptive=options.get("adaptive", False), **scheduler_options)
+    return provider
+
 if __name__ == "__main__":
     # Test the provider
     # provider = LLMProvider(model_name="ollama/llama3") # Example for local
@@ -0,0 +1,69 @@
+import hashlib
+import random
+import threading
+import time
+from typing import List
+from src.core.llm import BaseLLMProvider
+
+FALLBACK_PROGRAM = "def solution(*args):\n    return None\n"
+
+
+class MockLLMProvider(BaseLLMProvider):
+    """
+    Deterministic offline stand-in for an LLM, for benchmarking the engine without a server.
+
+    Responses are drawn from a corpus of programs, with a seeded choice per
+    (prompt, occurrence), so a run is reproducible regardless of thread scheduling
+    order. Some responses get a cosmetic mutation (comment or renamed local)
+    so the fitness cache and diversity code paths are exercised. Latency is simulated
+    as a fixed delay plus output tokens / `tokens_per_second`.
+    """
+
+    def __init__(self, corpus: List[str] = None, model_name: str = "mock", latency: float = 0.0,
+                 tokens_per_second: float = None, seed: int = 0):
+        self.corpus = [c for c in (corpus or []) if c.strip()] or [FALLBACK_PROGRAM]
+        self.model_name = model_name
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.seed = seed
+        self.calls = 0
+        self.output_tokens = 0
+        self._lock = threading.Lock()
+        self._occurrences = {}
+
+    def _rng(self, prompt: str) -> random.Random:
+        with self._lock:
+            index = self._occurrences.get(prompt, 0)
+            self._occurrences[prompt] = index + 1
+        digest = hashlib.sha256(f"{self.seed}:{index}:{prompt}".encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def _mutate(self, code: str, rng: random.Random) -> str:
+        roll = rng.random()
+        if roll < 0.3:
+            return f"# variant {rng.randrange(1000)}\n{code}"
+        if roll < 0.5:
+            return code.replace("result", f"result_{rng.randrange(100)}")
+        return code
+
+    def generate(self, prompt: str, system_prompt: str = None) -> str:
+        return self.generate_batch(prompt, 1, system_prompt=system_prompt)[0]
+
+    def generate_batch(self, prompt: str, n: int, system_prompt: str = None) -> List[str]:
+        """`n` programs for one simulated call, like a server supporting the `n` parameter."""
+        start = time.perf_counter()
+        rng = self._rng(prompt)
+        codes = [self._mutate(rng.choice(self.corpus), rng) for _ in range(max(1, n))]
+
+        tokens = sum(max(1, len(code) // 4) for code in codes)
+        delay = self.latency + (tokens / self.tokens_per_second if self.tokens_per_second else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        with self._lock:
+            self.calls += 1
+            self.output_tokens += tokens
+        if self.tracer is not None:
+            self.tracer.add("llm.generate", "llm", start, time.perf_counter() - start,
+                            prompt_tokens=len(prompt) // 4, completion_tokens=tokens, retries=0,
+                            cached=False, outcome="ok", choices=len(codes))
+        return codes
@@ -0,0 +1,124 @@
+import random
+from typing import Dict, List, Sequence
+from src.core.types import Individual
+
+# Objective vector of an individual (see `objectives_for`) and whether each is maximized
+OBJECTIVE_NAMES = ("fitness", "runtime", "memory_kb", "code_length")
+MAXIMIZE = (True, False, False, False)
+
+
+def objectives_for(ind: Individual) -> List[float]:
+    """Objectives in natural units: fitness, evaluation seconds, peak memory KB, code length."""
+    return [ind.fitness, ind.runtime, ind.peak_memory_kb, float(len(ind.code))]
+
+
+def _objectives(ind: Individual) -> List[float]:
+    return ind.objectives or objectives_for(ind)
+
+
+def dominates(a: Individual, b: Individual) -> bool:
+    """
+    Constrained Pareto dominance: a program with fitness 0 (broken) never dominates a working
+    one and is dominated by every working one, so crashing fast cannot win on runtime/memory.
+    """
+    if (a.fitness > 0) != (b.fitness > 0):
+        return a.fitness > 0
+    if a.fitness <= 0:
+        return False
+    better = False
+    for x, y, maximize in zip(_objectives(a), _objectives(b), MAXIMIZE):
+        if not maximize:
+            x, y = -x, -y
+        if x < y:
+            return False
+        if x > y:
+            better = True
+    return better
+
+
+def non_dominated_sort(individuals: Sequence[Individual]) -> List[List[int]]:
+    """Fast non-dominated sort (Deb et al. 2002): indices grouped into fronts, best front first."""
+    n = len(individuals)
+    dominated_by = [[] for _ in range(n)]  # i -> indices i dominates
+    counts = [0] * n  # number of individuals dominating i
+    fronts = [[]]
+    for i in range(n):
+        for j in range(i + 1, n):
+            if dominates(individuals[i], individuals[j]):
+                dominated_by[i].append(j)
+                counts[j] += 1
+            elif dominates(individuals[j], individuals[i]):
+                dominated_by[j].append(i)
+                counts[i] += 1
+        # Every pair involving i has been compared by now
+        if counts[i] == 0:
+            fronts[0].append(i)
+
+    while fronts[-1]:
+        next_front = []
+        for i in fronts[-1]:
+            for j in dominated_by[i]:
+                counts[j] -= 1
+                if counts[j] == 0:
+                    next_front.append(j)
+        fronts.append(next_front)
+    return fronts[:-1]
+
+
+def crowding_distance(individuals: Sequence[Individual], front: List[int]) -> Dict[int, float]:
+    """Crowding distance of each index in `front`; boundary points get infinity."""
+    distance = {i: 0.0 for i in front}
+    if len(front) <= 2:
+        return {i: float("inf") for i in front}
+    for m in range(len(OBJECTIVE_NAMES)):
+        values = {i: _objectives(individuals[i])[m] for i in front}
+        ordered = sorted(front, key=values.get)
+        low, high = values[ordered[0]], values[ordered[-1]]
+        distance[ordered[0]] = distance[ordered[-1]] = float("inf")
+        if high == low:
+            continue
+        for k in range(1, len(ordered) - 1):
+            distance[ordered[k]] += (values[ordered[k + 1]] - values[ordered[k - 1]]) / (high - low)
+    return distance
+
+
+def rank_and_crowding(individuals: Sequence[Individual]) -> Dict[int, tuple]:
+    """index -> (front rank, crowding distance)."""
+    info = {}
+    for rank, front in enumerate(non_dominated_sort(individuals)):
+        for i, distance in crowding_distance(individuals, front).items():
+            info[i] = (rank, distance)
+    return info
+
+
+def nsga2_select(individuals: Sequence[Individual], k: int) -> List[Individual]:
+    """NSGA-II environmental selection: fill by front, breaking the last front by crowding distance."""
+    selected = []
+    for front in non_dominated_sort(individuals):
+        if len(selected) + len(front) <= k:
+            selected.extend(individuals[i] for i in front)
+            continue
+        distance = crowding_distance(individuals, front)
+        front = sorted(front, key=lambda i: distance[i], reverse=True)
+        selected.extend(individuals[i] for i in front[:k - len(selected)])
+        break
+    return selected
+
+
+def crowded_tournament(individuals: Sequence[Individual], count: int, rng: random.Random = random) -> List[Individual]:
+    """Binary tournaments on (lower rank, then larger crowding distance)."""
+    info = rank_and_crowding(individuals)
+    winners = []
+    for _ in range(count):
+        a, b = rng.randrange(len(individuals)), rng.randrange(len(individuals))
+        ra, rb = info[a], info[b]
+        winner = a if (ra[0], -ra[1]) <= (rb[0], -rb[1]) else b
+        winners.append(individuals[winner])
+    return winners
+
+
+def pareto_front(individuals: Sequence[Individual]) -> List[Individual]:
+    """The first non-dominated front, best fitness first."""
+    fronts = non_dominated_sort(individuals)
+    front = [individuals[i] for i in fronts[0]] if fronts else []
+    return sorted(front, key=lambda ind: ind.fitness, reverse=True)
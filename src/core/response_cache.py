@@ -0,0 +1,101 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+
+class CacheMissError(Exception):
+    """Raised in replay mode when a request has no cached response."""
+    pass
+
+
+class ResponseCache:
+    """
+    SQLite-backed cache of LLM responses with a size cap and LRU eviction.
+
+    Entries are keyed by (model, system prompt, prompt, sampling params, sample index).
+    The sample index lets repeated identical prompts (e.g. several mutations of the same
+    parent) map to distinct cached responses, so replaying a run reproduces it exactly.
+    """
+
+    def __init__(self, path: str = ".cache/llm_responses.sqlite", max_entries: int = 10000, namespace: str = ""):
+        self.path = Path(path)
+        # Separates sample streams of runs sharing one file (e.g. islands)
+        self.namespace = namespace
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._occurrences = {}  # request key -> number of times seen in this session
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, response TEXT NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses(last_used)")
+        self._conn.commit()
+
+    @staticmethod
+    def request_key(model: str, system_prompt: Optional[str], prompt: str, params: dict) -> str:
+        payload = json.dumps([model, system_prompt, prompt, params], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def next_key(self, request_key: str) -> str:
+        """Cache key of the next sample for this request within the current session."""
+        with self._lock:
+            index = self._occurrences.get(request_key, 0)
+            self._occurrences[request_key] = index + 1
+        return f"{self.namespace}{request_key}:{index}"
+
+    def take(self, request_key: str) -> Optional[str]:
+        """The next cached sample for this request, consuming its key only if it is cached."""
+        with self._lock:
+            index = self._occurrences.get(request_key, 0)
+            key = f"{self.namespace}{request_key}:{index}"
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self._occurrences[request_key] = index + 1
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+            return row[0]
+
+    def put(self, key: str, response: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, last_used) VALUES (?, ?, ?)",
+                (key, response, time.time())
+            )
+            # Evict least recently used entries beyond the cap
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+            if count > self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_used ASC LIMIT ?)",
+                    (count - self.max_entries,)
+                )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
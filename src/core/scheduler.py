@@ -0,0 +1,192 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, List, Optional, Union
+from src.core.llm import BaseLLMProvider, estimate_tokens
+from src.core.response_cache import CacheMissError
+
+
+class BudgetExhausted(Exception):
+    """Raised when a run's total request or token budget is spent."""
+    pass
+
+
+class LLMScheduler(BaseLLMProvider):
+    """
+    Admission control in front of a provider.
+
+    - Enforces requests/minute and tokens/minute over a sliding 60s window.
+    - With `adaptive`, limits requests in flight with an AIMD window: +1 per window of successful
+      calls, halved on errors or when latency exceeds `latency_factor` x the best
+      latency seen (a sign the server is saturated).
+    - Enforces total request/token budgets for the run; once spent, every call
+      raises BudgetExhausted so the engine can stop cleanly.
+    - Retries failed calls (up to `max_attempts`, exponential backoff) itself, so every attempt
+      is admitted, charged and counted as an error. Responses the provider serves from its
+      cache skip admission entirely.
+    """
+
+    def __init__(self, provider: BaseLLMProvider, requests_per_minute: float = None,
+                 tokens_per_minute: float = None, max_requests: int = None, max_tokens: int = None,
+                 max_concurrency: int = 16, adaptive: bool = True, initial_concurrency: int = 2,
+                 latency_factor: float = 3.0, max_attempts: int = 3):
+        self.provider = provider
+        # The provider must not retry behind the scheduler's back
+        provider.max_attempts = 1
+        self.max_attempts = max(1, max_attempts)
+        self.model_name = provider.model_name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.max_requests = max_requests
+        self.max_tokens = max_tokens
+        self.max_concurrency = max(1, max_concurrency)
+        # Without adaptation the window stays at max_concurrency (only rates/budgets apply)
+        self.adaptive = adaptive
+        start = initial_concurrency if adaptive else self.max_concurrency
+        self.limit = float(min(max(1, start), self.max_concurrency))
+        self.latency_factor = latency_factor
+
+        self.requests_used = 0
+        self.tokens_used = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.waiting = 0
+        self.best_latency: Optional[float] = None
+        self._avg_completion_tokens = 0.0
+        # Calls (timestamps) and tokens (timestamp, count) within the last minute
+        self._request_window = deque()
+        self._token_window = deque()
+        self._cond = threading.Condition()
+
+    # The engine hands its tracer to the provider it sees; pass it through
+    @property
+    def tracer(self):
+        return self.provider.tracer
+
+    @tracer.setter
+    def tracer(self, value):
+        self.provider.tracer = value
+
+    def _check_budget(self):
+        if self.max_requests is not None and self.requests_used >= self.max_requests:
+            raise BudgetExhausted(f"Request budget of {self.max_requests} spent")
+        if self.max_tokens is not None and self.tokens_used >= self.max_tokens:
+            raise BudgetExhausted(f"Token budget of {self.max_tokens} spent")
+
+    def _rate_delay(self, now: float, tokens: int) -> float:
+        """Seconds to wait before a call of `tokens` fits the per-minute limits (0 if it fits now)."""
+        while self._request_window and now - self._request_window[0] >= 60:
+            self._request_window.popleft()
+        while self._token_window and now - self._token_window[0][0] >= 60:
+            self._token_window.popleft()
+        delay = 0.0
+        if self.requests_per_minute and len(self._request_window) >= self.requests_per_minute:
+            delay = max(delay, 60 - (now - self._request_window[0]))
+        if self.tokens_per_minute and self._token_window:
+            used = sum(t for _, t in self._token_window)
+            if used + tokens > self.tokens_per_minute:
+                delay = max(delay, 60 - (now - self._token_window[0][0]))
+        return delay
+
+    def _acquire(self, prompt_tokens: int):
+        expected = prompt_tokens + int(self._avg_completion_tokens)
+        with self._cond:
+            self.waiting += 1
+            try:
+                while True:
+                    self._check_budget()
+                    if self.in_flight < int(self.limit):
+                        delay = self._rate_delay(time.time(), expected)
+                        if delay <= 0:
+                            break
+                        self._cond.wait(timeout=delay)
+                    else:
+                        self._cond.wait(timeout=1.0)
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            self.requests_used += 1
+            self._request_window.append(time.time())
+
+    def _release(self, latency: float, tokens: int, completion_tokens: int, ok: bool):
+        with self._cond:
+            self.in_flight -= 1
+            self.tokens_used += tokens
+            self._token_window.append((time.time(), tokens))
+            if ok:
+                self._avg_completion_tokens = 0.8 * self._avg_completion_tokens + 0.2 * completion_tokens
+
+            if not self.adaptive:
+                if not ok:
+                    self.errors += 1
+            elif ok:
+                if self.best_latency is None or latency < self.best_latency:
+                    self.best_latency = latency
+                if latency > self.latency_factor * self.best_latency:
+                    self.limit = max(1.0, self.limit / 2)
+                else:
+                    self.limit = min(float(self.max_concurrency), self.limit + 1.0 / self.limit)
+            else:
+                self.errors += 1
+                self.limit = max(1.0, self.limit / 2)
+            self._cond.notify_all()
+
+    def generate(self, prompt: str, system_prompt: str = None) -> str:
+        hit = self.provider.cached(prompt, system_prompt)
+        if hit is not None:
+            return hit[0]
+        return self._scheduled(prompt, system_prompt, lambda: self.provider.generate(prompt, system_prompt=system_prompt))
+
+    def generate_batch(self, prompt: str, n: int, system_prompt: str = None) -> List[str]:
+        hit = self.provider.cached(prompt, system_prompt, n)
+        if hit is not None:
+            return hit
+        return self._scheduled(prompt, system_prompt,
+                               lambda: self.provider.generate_batch(prompt, n, system_prompt=system_prompt))
+
+    def cached(self, prompt: str, system_prompt: str = None, n: int = 1) -> Optional[List[str]]:
+        return self.provider.cached(prompt, system_prompt, n)
+
+    def last_usage(self) -> Optional[dict]:
+        return self.provider.last_usage()
+
+    def _scheduled(self, prompt: str, system_prompt: Optional[str], call: Callable) -> Union[str, List[str]]:
+        prompt_tokens = estimate_tokens(prompt, system_prompt)
+        for attempt in range(1, self.max_attempts + 1):
+            queued = time.perf_counter()
+            self._acquire(prompt_tokens)
+            if self.tracer is not None:
+                self.tracer.add("llm.queue_wait", "llm", queued, time.perf_counter() - queued,
+                                queue_depth=self.waiting, limit=self.limit, attempt=attempt)
+
+            start = time.perf_counter()
+            try:
+                response = call()
+                break
+            except Exception as e:
+                self._release(time.perf_counter() - start, prompt_tokens, 0, ok=False)
+                if attempt == self.max_attempts or isinstance(e, CacheMissError):
+                    raise
+            # Back off without holding a slot, so other requests can use it meanwhile
+            time.sleep(min(10.0, 2.0 ** (attempt - 1)))
+
+        usage = self.provider.last_usage()
+        if usage:
+            completion_tokens = usage.get("completion_tokens", 0)
+            tokens = usage.get("prompt_tokens", 0) + completion_tokens
+        else:
+            completion_tokens = estimate_tokens(*(response if isinstance(response, list) else [response]))
+            tokens = prompt_tokens + completion_tokens
+        self._release(time.perf_counter() - start, tokens, completion_tokens, ok=True)
+        return response
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                "queue_depth": self.waiting,
+                "in_flight": self.in_flight,
+                "concurrency_limit": self.limit,
+                "requests": self.requests_used,
+                "tokens": self.tokens_used,
+                "errors": self.errors
+            }
@@ -0,0 +1,148 @@
+import ast
+import builtins
+import random
+import re
+import zlib
+from collections import defaultdict
+from typing import Dict, Hashable, Iterator, List, Optional, Tuple
+from src.tasks.candidate import extract_code
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_BUILTINS = set(dir(builtins))
+_PRIME = (1 << 61) - 1
+
+
+def _preorder(node: ast.AST) -> Iterator[ast.AST]:
+    yield node
+    for child in ast.iter_child_nodes(node):
+        # Docstrings and bare string expressions don't change behaviour
+        if isinstance(child, ast.Expr) and isinstance(child.value, ast.Constant) \
+                and isinstance(child.value.value, str):
+            continue
+        yield from _preorder(child)
+
+
+def code_tokens(code: str) -> List[str]:
+    """
+    Normalized AST tokens: node types in source order, with local names replaced by a
+    placeholder (builtins and attribute names are kept), so renaming variables or
+    reformatting doesn't change the tokens. Unparseable code falls back to its words.
+    """
+    clean_code = extract_code(code)
+    try:
+        tree = ast.parse(clean_code)
+    except (SyntaxError, ValueError):
+        return re.findall(r"\w+|[^\w\s]", clean_code)
+    tokens = []
+    for node in _preorder(tree):
+        if isinstance(node, (ast.Load, ast.Store, ast.Del)):
+            continue
+        if isinstance(node, ast.Name):
+            tokens.append(node.id if node.id in _BUILTINS else "Name")
+        elif isinstance(node, ast.Attribute):
+            tokens.append("." + node.attr)
+        elif isinstance(node, ast.Constant):
+            value = repr(node.value)
+            tokens.append(value if len(value) <= 12 else type(node.value).__name__)
+        else:
+            tokens.append(type(node).__name__)
+    return tokens
+
+
+def shingles(tokens: List[str], size: int = 4) -> List[int]:
+    """32-bit hashes of every run of `size` consecutive tokens."""
+    if len(tokens) <= size:
+        return [zlib.crc32(" ".join(tokens).encode())]
+    return list({zlib.crc32(" ".join(tokens[i:i + size]).encode()) for i in range(len(tokens) - size + 1)})
+
+
+class MinHasher:
+    """MinHash signatures: the Jaccard similarity of two shingle sets is estimated by the
+    fraction of positions where their signatures agree."""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = random.Random(seed)
+        # a, b < 2^31 and shingle hashes < 2^32 keep a * x + b inside 64 bits
+        self.a = [rng.randrange(1, 1 << 31) for _ in range(num_perm)]
+        self.b = [rng.randrange(0, 1 << 31) for _ in range(num_perm)]
+        if np is not None:
+            self._a = np.array(self.a, dtype=np.uint64)[:, None]
+            self._b = np.array(self.b, dtype=np.uint64)[:, None]
+
+    def signature(self, hashes: List[int]) -> Tuple[int, ...]:
+        if np is not None:
+            x = np.array(hashes, dtype=np.uint64)[None, :]
+            return tuple(((self._a * x + self._b) % np.uint64(_PRIME)).min(axis=1).tolist())
+        return tuple(min((a * x + b) % _PRIME for x in hashes) for a, b in zip(self.a, self.b))
+
+
+def similarity(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """Estimated Jaccard similarity of two MinHash signatures."""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+
+def _lsh_params(num_perm: int, threshold: float) -> Tuple[int, int]:
+    """
+    (bands, rows) splitting the signature for LSH. Two programs share a bucket with high
+    probability once their similarity passes about (1/bands)^(1/rows), so pick the
+    largest such point still below `threshold` (few missed duplicates, few candidates).
+    """
+    best = (num_perm, 1)
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        if (1 / bands) ** (1 / rows) <= threshold * 0.9:
+            best = (bands, rows)
+    return best
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index over normalized AST token shingles. `query` finds the most similar
+    indexed program at or above `threshold` by only comparing programs that share an LSH
+    bucket, so lookups stay cheap as the archive grows.
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 64, shingle_size: int = 4):
+        if not 0 < threshold <= 1:
+            raise ValueError(f"Similarity threshold must be in (0, 1], got {threshold}")
+        self.threshold = threshold
+        self.shingle_size = shingle_size
+        self.hasher = MinHasher(num_perm)
+        self.bands, self.rows = _lsh_params(num_perm, threshold)
+        self._buckets: List[Dict[Tuple[int, ...], List[Hashable]]] = [defaultdict(list) for _ in range(self.bands)]
+        self._signatures: Dict[Hashable, Tuple[int, ...]] = {}
+
+    def signature(self, code: str) -> Tuple[int, ...]:
+        return self.hasher.signature(shingles(code_tokens(code), self.shingle_size))
+
+    def _bands(self, signature: Tuple[int, ...]) -> Iterator[Tuple[int, ...]]:
+        for band in range(self.bands):
+            yield signature[band * self.rows:(band + 1) * self.rows]
+
+    def add(self, key: Hashable, signature: Tuple[int, ...]):
+        if key in self._signatures:
+            return
+        self._signatures[key] = signature
+        for buckets, band in zip(self._buckets, self._bands(signature)):
+            buckets[band].append(key)
+
+    def query(self, signature: Tuple[int, ...]) -> Optional[Tuple[Hashable, float]]:
+        """(key, estimated similarity) of the closest indexed program, if any reaches the threshold."""
+        candidates = set()
+        for buckets, band in zip(self._buckets, self._bands(signature)):
+            candidates.update(buckets.get(band, ()))
+        best = None
+        for key in candidates:
+            score = similarity(signature, self._signatures[key])
+            if score >= self.threshold and (best is None or score > best[1]):
+                best = (key, score)
+        return best
+
+    def __len__(self) -> int:
+        return len(self._signatures)
@@ -0,0 +1,94 @@
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+
+
+class Tracer:
+    """
+    Collects timed spans (LLM calls, evaluations, generation phases) from any thread.
+
+    Spans are kept in memory and can be exported as a Chrome trace (open in
+    chrome://tracing or https://ui.perfetto.dev) and summarized into TensorBoard.
+    """
+
+    def __init__(self, max_events: int = 1_000_000):
+        self.max_events = max_events
+        self.events: List[dict] = []
+        self.dropped = 0
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._flushed = 0  # index of the first event not yet written to TensorBoard
+
+    def add(self, name: str, category: str, start: float, duration: float, **args):
+        """Record a span measured elsewhere. `start` is a time.perf_counter() value."""
+        event = {
+            "name": name,
+            "cat": category,
+            "ph": "X",
+            "ts": (start - self._origin) * 1e6,
+            "dur": duration * 1e6,
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args
+        }
+        with self._lock:
+            if len(self.events) >= self.max_events:
+                self.dropped += 1
+                return
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name: str, category: str = "engine", **args):
+        """Time the enclosed block. The yielded dict can be filled with extra span arguments."""
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            self.add(name, category, start, time.perf_counter() - start, **args)
+
+    def export_chrome(self, path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            events = list(self.events)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        return path
+
+    def summary(self) -> Dict[str, dict]:
+        """Count and total seconds per span name."""
+        totals = defaultdict(lambda: {"count": 0, "seconds": 0.0})
+        with self._lock:
+            for event in self.events:
+                totals[event["name"]]["count"] += 1
+                totals[event["name"]]["seconds"] += event["dur"] / 1e6
+        return dict(totals)
+
+    def write_tensorboard(self, writer, step: int):
+        """Log spans recorded since the last call as TensorBoard histograms and scalars."""
+        with self._lock:
+            events = self.events[self._flushed:]
+            self._flushed = len(self.events)
+
+        durations = defaultdict(list)
+        numeric_args = defaultdict(list)
+        for event in events:
+            durations[event["name"]].append(event["dur"] / 1e6)
+            for key, value in event["args"].items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    numeric_args[f"{event['name']}/{key}"].append(value)
+
+        for name, values in durations.items():
+            writer.add_scalar(f"Trace/{name}/Seconds", sum(values), step)
+            writer.add_scalar(f"Trace/{name}/Count", len(values), step)
+            if len(values) > 1:
+                writer.add_histogram(f"Trace/{name}/Duration", values, step)
+        for name, values in numeric_args.items():
+            writer.add_scalar(f"Trace/{name}", sum(values), step)
+            if len(values) > 1:
+                writer.add_histogram(f"Trace/{name}/Distribution", values, step)
@@ -1,7 +1,42 @@
-from dataclasses import dataclass
+import uuid
+from dataclasses import dataclass, field
+from typing import List, Optional
 
 @dataclass
 class Individual:
     code: str
     fitness: float = 0.0
     feedback: str = ""
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    generation: int = 0
+    parent_id: Optional[str] = None
+    # Wall-clock time of the last evaluation in seconds
+    runtime: float = 0.0
+    # Peak memory used by the last evaluation in KB (0 if not measured)
+    peak_memory_kb: float = 0.0
+    # Objective vector for multi-objective selection (see src.core.pareto.OBJECTIVE_NAMES)
+    objectives: List[float] = field(default_factory=list)
+    # The last evaluation stopped early at a threshold, so `fitness` is not final
+    partial: bool = False
+    # `fitness` was copied from a near-duplicate; this program has not run yet
+    reused: bool = False
+
+@dataclass
+class EvaluationResult:
+    fitness: float = 0.0
+    feedback: str = ""
+    duration: float = 0.0
+    # time.perf_counter() in the engine process when the evaluation started (0 if unknown)
+    started: float = 0.0
+    # Last cascade stage reached (empty for tasks without stages)
+    stage: str = ""
+    # CPU seconds used by the evaluation
+    cpu_time: float = 0.0
+    # Peak memory used by the evaluation in KB (0 if not measured): growth of the evaluation
+    # process's peak RSS, or the tracemalloc peak for inline evaluation with track_memory
+    peak_memory_kb: float = 0.0
+    # The cascade stopped because the candidate could no longer beat the threshold: `fitness`
+    # only covers the stages that ran and says nothing about the program's final score
+    partial: bool = False
+    # Copied from a near-duplicate program instead of running this one (dedup policy "reuse")
+    reused: bool = False
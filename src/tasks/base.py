@@ -1,6 +1,49 @@
+import time
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple, Union
+from src.core.types import EvaluationResult
+from src.tasks.candidate import Candidate, FORBIDDEN_MODULES, prepare_candidate
+
+# A stage returns its score in [0, 1], optionally with feedback for the LLM
+StageOutput = Union[float, Tuple[float, str]]
+
+# Time limit for stages the reference solution could not be timed on
+DEFAULT_STAGE_TIMEOUT = 5.0
+
+
+@dataclass
+class EvaluationStage:
+    """One step of a cascade evaluation (see AbstractBaseTask.stages)."""
+    name: str
+    run: Callable[[dict], StageOutput]
+    # Share of the final fitness contributed by this stage
+    weight: float = 1.0
+    # Minimum stage score needed to continue; below it the cascade stops
+    required: Optional[float] = None
+    # Time limit in seconds for stages with their own time budget; other stages are
+    # calibrated from the reference solution (see AbstractBaseTask.stage_timeouts)
+    timeout: Optional[float] = None
+
 
 class AbstractBaseTask(ABC):
+    # Set for tasks whose fitness depends on measured runtime, so the engine can
+    # optionally re-measure cached programs instead of reusing their score.
+    timing_sensitive: bool = False
+
+    # Function the task calls and how many positional arguments it passes. Candidates
+    # not defining it are matched by signature (see src.tasks.candidate).
+    entry_point: Optional[str] = None
+    entry_arity: int = 1
+    # Functions that must all be defined, by exact name
+    required_functions: Tuple[str, ...] = ()
+    forbidden_modules: FrozenSet[str] = FORBIDDEN_MODULES
+
+    # Calibrated time limits: a stage may take `timeout_factor` x what the first reference
+    # solution needs on this machine, and at least `timeout_floor` seconds
+    timeout_factor: float = 10.0
+    timeout_floor: float = 0.5
+
     @property
     @abstractmethod
     def name(self) -> str:
@@ -13,17 +56,152 @@ class AbstractBaseTask(ABC):
         pass
 
     @abstractmethod
-    def evaluate(self, code: str) -> float:
+    def evaluate(self, code: str) -> Union[float, EvaluationResult]:
         """
-        Evaluate the code and return a fitness score (0.0 to 1.0).
+        Evaluate the code and return a fitness score (0.0 to 1.0),
+        or an EvaluationResult to also report feedback for the next mutation.
         """
         pass
 
+    # Optional cascade evaluation. Tasks returning ordered stages from `stages()` are
+    # evaluated stage by stage (cheapest first) and stopped at the first failing stage,
+    # or as soon as they can no longer reach the engine's threshold.
+    def stages(self) -> Optional[List[EvaluationStage]]:
+        return None
+
+    def prepare(self, code: str) -> Candidate:
+        """Statically check and compile a candidate (memoized); raises CandidateError if it must not run."""
+        return prepare_candidate(code, self.entry_point, self.entry_arity, self.required_functions,
+                                 self.forbidden_modules)
+
+    def syntax_stage(self) -> EvaluationStage:
+        """Prepare the candidate without running it. Stores it in ctx["candidate"] and its code object in ctx["compiled"]."""
+        def run(ctx: dict) -> float:
+            ctx["candidate"] = self.prepare(ctx["code"])
+            ctx["compiled"] = ctx["candidate"].compiled
+            return 1.0
+        return EvaluationStage("syntax", run, weight=0.0, required=1.0)
+
+    def load_namespace(self, ctx: dict) -> dict:
+        """Execute the compiled candidate once per evaluation and return its namespace."""
+        if "namespace" not in ctx:
+            namespace = {}
+            exec(ctx["compiled"], namespace)
+            ctx["namespace"] = namespace
+        return ctx["namespace"]
+
+    def entry_function(self, ctx: dict) -> Callable:
+        """The candidate's entry-point function (after the syntax stage)."""
+        name = ctx["candidate"].entry_point
+        func = self.load_namespace(ctx).get(name)
+        if not callable(func):
+            raise ValueError(f"`{name}` is not callable")
+        return func
+
+    def stage_timeouts(self) -> Dict[str, float]:
+        """
+        Per-stage time limits in seconds: the stage's declared timeout, or `timeout_factor` x
+        the time the first reference solution needs (measured once per task instance), never
+        below `timeout_floor`.
+        """
+        if getattr(self, "_stage_timeouts", None) is None:
+            stages = self.stages() or []
+            references = self.reference_solutions()
+            self._reference_times: Dict[str, float] = {}
+            if references:
+                ctx = {"code": references[0]}
+                for stage in stages:
+                    start = time.perf_counter()
+                    try:
+                        stage.run(ctx)
+                    except Exception:
+                        break
+                    self._reference_times[stage.name] = time.perf_counter() - start
+            self._stage_timeouts = {}
+            for stage in stages:
+                if stage.timeout is not None:
+                    limit = stage.timeout
+                elif stage.name in self._reference_times:
+                    limit = self.timeout_factor * self._reference_times[stage.name]
+                else:
+                    limit = DEFAULT_STAGE_TIMEOUT
+                self._stage_timeouts[stage.name] = max(self.timeout_floor, limit)
+        return self._stage_timeouts
+
+    def evaluation_timeout(self) -> float:
+        """Wall-clock budget for a whole evaluation: the sum of the stage limits."""
+        timeouts = self.stage_timeouts()
+        return sum(timeouts.values()) if timeouts else DEFAULT_STAGE_TIMEOUT
+
+    def _describe_timeout(self, stage: EvaluationStage) -> str:
+        limit = self.stage_timeouts()[stage.name]
+        reference = self._reference_times.get(stage.name)
+        if stage.timeout is not None or reference is None:
+            return f"Stage '{stage.name}' timed out (>{limit:.2f}s)"
+        return (f"Stage '{stage.name}' timed out (>{limit:.2f}s; the reference solution needs {reference:.3f}s, "
+                f"limit is {self.timeout_factor:g}x that with a {self.timeout_floor:g}s floor)")
+
+    def evaluate_cascade(self, code: str, threshold: float = 0.0) -> EvaluationResult:
+        # Imported here: the evaluator module imports this one
+        from src.core.evaluator import TimeoutException, time_limit
+
+        stages = self.stages()
+        timeouts = self.stage_timeouts()
+        total = sum(stage.weight for stage in stages) or 1.0
+        achieved = 0.0
+        remaining = total
+        notes = []
+        ctx = {"code": code}
+
+        for i, stage in enumerate(stages):
+            remaining -= stage.weight
+            try:
+                with time_limit(timeouts.get(stage.name)):
+                    output = stage.run(ctx)
+            except TimeoutException:
+                notes.append(self._describe_timeout(stage))
+                return EvaluationResult(fitness=achieved / total, feedback="; ".join(notes), stage=stage.name)
+            except Exception as e:
+                return EvaluationResult(fitness=achieved / total,
+                                        feedback=f"Stage '{stage.name}' failed: {e}", stage=stage.name)
+            score, note = output if isinstance(output, tuple) else (output, "")
+            achieved += stage.weight * score
+            if note:
+                notes.append(note)
+
+            if stage.required is not None and score < stage.required:
+                notes.append(f"Stage '{stage.name}' scored {score:.2f} (needs {stage.required:.2f})")
+                return EvaluationResult(fitness=achieved / total, feedback="; ".join(notes), stage=stage.name)
+            upper_bound = (achieved + remaining) / total
+            if i < len(stages) - 1 and upper_bound < threshold:
+                notes.append(f"Stopped after stage '{stage.name}': best possible fitness {upper_bound:.2f} "
+                             f"cannot beat {threshold:.2f}")
+                return EvaluationResult(fitness=achieved / total, feedback="; ".join(notes), stage=stage.name,
+                                        partial=True)
+
+        return EvaluationResult(fitness=achieved / total, feedback="; ".join(notes),
+                                stage=stages[-1].name if stages else "")
+
+    def run_evaluation(self, code: str, threshold: float = 0.0) -> Union[float, EvaluationResult]:
+        """Entry point used by the evaluators: the cascade if the task defines stages, else `evaluate`."""
+        if self.stages():
+            return self.evaluate_cascade(code, threshold)
+        return self.evaluate(code)
+
+    def reference_solutions(self) -> List[str]:
+        """Known programs for this task (good and flawed), e.g. as a corpus for the offline mock LLM."""
+        return []
+
     # Optional hooks for custom prompting strategies
     def initial_prompt(self) -> str:
         return f"Write a Python function for this task: {self.description}. Return ONLY the code, no markdown."
 
-    def mutation_prompt(self, code: str, feedback: str, current_fitness: float) -> str:
+    def mutation_prompt(self, code: str, feedback: str, current_fitness: float, inspirations: list = None) -> str:
+        inspiration_text = ""
+        if inspirations:
+            inspiration_text = "Other programs from the archive, for inspiration:\n" + "\n".join(
+                f"# --- Fitness: {ind.fitness} ---\n{ind.code}\n" for ind in inspirations
+            )
         return f"""
         You are an Evolutionary Agent. Your goal is to improve the following code.
         
@@ -40,5 +218,40 @@ class AbstractBaseTask(ABC):
         Code to Improve:
         {code}
         
+        {inspiration_text}
+        
         Return ONLY the valid Python code (with your hypothesis in comments).
         """
+
+    def diff_mutation_prompt(self, code: str, feedback: str, current_fitness: float, inspirations: list = None) -> str:
+        inspiration_text = ""
+        if inspirations:
+            inspiration_text = "Other programs from the archive, for inspiration:\n" + "\n".join(
+                f"# --- Fitness: {ind.fitness} ---\n{ind.code}\n" for ind in inspirations
+            )
+        return f"""
+        You are an Evolutionary Agent. Your goal is to improve the following code by editing it.
+        
+        Current Fitness: {current_fitness}
+        Previous Feedback: {feedback}
+        
+        CRITICAL INSTRUCTION:
+        1. ANALYZE: Why did the previous code fail or perform poorly?
+        2. HYPOTHESIZE: Propose a SPECIFIC algorithmic change to improve fitness.
+        3. IMPLEMENT: Describe the change as one or more SEARCH/REPLACE blocks.
+        
+        Code to Improve:
+        {code}
+        
+        {inspiration_text}
+        
+        Return ONLY SEARCH/REPLACE blocks in exactly this format, where SEARCH is copied
+        verbatim from the code above:
+        <<<<<<< SEARCH
+        lines to replace
+        =======
+        new lines
+        >>>>>>> REPLACE
+        
+        Do not return the whole program.
+        """
@@ -0,0 +1,104 @@
+import math
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Sequence
+
+
+@dataclass
+class TimingStats:
+    median: float
+    iqr: float
+    minimum: float
+    samples: List[float] = field(default_factory=list)
+
+    def describe(self) -> str:
+        return f"median {self.median * 1000:.3f}ms (IQR {self.iqr * 1000:.3f}ms, min {self.minimum * 1000:.3f}ms, n={len(self.samples)})"
+
+
+def time_call(func: Callable, make_args: Callable[[], tuple], warmup: int = 1, repeats: int = 5,
+              max_seconds: float = None) -> TimingStats:
+    """
+    Time `func(*make_args())` with warm-up runs and repeated trials.
+
+    Arguments are rebuilt for every call (outside the timed region) so in-place
+    mutation cannot leak between trials. Stops early once `max_seconds` of
+    measured time is spent, keeping at least one trial.
+    """
+    for _ in range(warmup):
+        func(*make_args())
+
+    samples = []
+    spent = 0.0
+    for _ in range(max(1, repeats)):
+        args = make_args()
+        start = time.perf_counter()
+        func(*args)
+        duration = time.perf_counter() - start
+        samples.append(duration)
+        spent += duration
+        if max_seconds is not None and spent >= max_seconds:
+            break
+
+    samples.sort()
+    if len(samples) >= 4:
+        quartiles = statistics.quantiles(samples, n=4)
+        iqr = quartiles[2] - quartiles[0]
+    else:
+        iqr = samples[-1] - samples[0]
+    return TimingStats(median=statistics.median(samples), iqr=iqr, minimum=samples[0], samples=samples)
+
+
+def scaling_exponent(sizes: Sequence[float], times: Sequence[float]) -> float:
+    """Least-squares slope of log(time) against log(size): ~1 for linear, ~2 for quadratic."""
+    points = [(math.log(n), math.log(t)) for n, t in zip(sizes, times) if n > 0 and t > 0]
+    if len(points) < 2:
+        return float("nan")
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    denom = sum((x - mean_x) ** 2 for x, _ in points)
+    if denom == 0:
+        return float("nan")
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / denom
+
+
+@dataclass
+class LadderResult:
+    sizes: List[int]
+    stats: List[TimingStats]
+    exponent: float
+
+    def describe(self) -> str:
+        rungs = ", ".join(f"n={n}: {s.median * 1000:.3f}ms" for n, s in zip(self.sizes, self.stats))
+        return f"{rungs}; scaling ~ n^{self.exponent:.2f}"
+
+
+def time_ladder(func: Callable, make_args: Callable[[int], tuple], sizes: Sequence[int], warmup: int = 1,
+                repeats: int = 5, max_seconds: float = None) -> LadderResult:
+    """Time `func` over a ladder of input sizes and estimate its scaling exponent."""
+    stats = [
+        time_call(func, lambda n=n: make_args(n), warmup=warmup, repeats=repeats, max_seconds=max_seconds)
+        for n in sizes
+    ]
+    return LadderResult(sizes=list(sizes), stats=stats,
+                        exponent=scaling_exponent(sizes, [s.median for s in stats]))
+
+
+# Reference timings are measured once per process and input key, since they only
+# depend on the machine.
+_reference_cache: Dict[Any, TimingStats] = {}
+
+
+def calibrate(key: Any, reference: Callable, make_args: Callable[[], tuple], warmup: int = 2,
+              repeats: int = 7) -> TimingStats:
+    """Time a reference implementation on this machine, memoized by `key`."""
+    if key not in _reference_cache:
+        _reference_cache[key] = time_call(reference, make_args, warmup=warmup, repeats=repeats)
+    return _reference_cache[key]
+
+
+def speed_score(candidate: TimingStats, reference: TimingStats) -> float:
+    """reference median / candidate median, capped at 1.0 (as fast as the reference or faster)."""
+    if candidate.median <= 0:
+        return 1.0
+    return min(1.0, reference.median / candidate.median)
@@ -0,0 +1,163 @@
+import ast
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from types import CodeType
+from typing import FrozenSet, List, Optional, Tuple
+
+# Modules a candidate may not import: process/file/network access and interpreter internals
+FORBIDDEN_MODULES = frozenset({
+    "os", "sys", "subprocess", "shutil", "socket", "ctypes", "signal", "multiprocessing",
+    "pathlib", "importlib", "builtins", "pickle", "marshal", "resource", "gc", "inspect",
+    "urllib", "http", "requests", "asyncio",
+})
+# Builtins that run code or touch the outside world
+FORBIDDEN_CALLS = frozenset({"exec", "eval", "compile", "__import__", "open", "input", "breakpoint",
+                             "exit", "quit", "globals", "vars", "getattr", "setattr", "delattr"})
+# Attributes used to escape to builtins/frames
+FORBIDDEN_ATTRIBUTES = frozenset({"__subclasses__", "__globals__", "__builtins__", "__code__", "__bases__",
+                                  "__mro__", "__import__", "f_globals", "f_locals", "f_back", "gi_frame"})
+
+FENCE_RE = re.compile(r"```[ \t]*([\w+-]*)[^\n]*\n(.*?)```", re.S)
+# First line of actual code when the model wraps it in prose
+CODE_START_RE = re.compile(r"^(def |class |import |from |@|async def |[A-Za-z_]\w*\s*=)")
+
+
+class CandidateError(ValueError):
+    """The candidate was rejected before execution (unparsable, dangerous or missing its entry point)."""
+    pass
+
+
+@dataclass(frozen=True)
+class Candidate:
+    """A program that passed static checks, ready to execute."""
+    source: str
+    compiled: CodeType
+    # Top-level function names in definition order
+    functions: Tuple[str, ...]
+    # Function the task calls, or None if the task does not declare one
+    entry_point: Optional[str]
+
+
+def _parses(source: str) -> bool:
+    try:
+        ast.parse(source)
+        return True
+    except (SyntaxError, ValueError):
+        return False
+
+
+def extract_code(text: str) -> str:
+    """
+    Pull the program out of an LLM response.
+
+    Fenced blocks win (the longest python block that parses, since models often add a
+    separate usage example). Otherwise prose lines before the first code-looking line
+    and after the last parsable line are dropped.
+    """
+    blocks = FENCE_RE.findall(text)
+    if blocks:
+        python = [body for lang, body in blocks if lang.lower() in ("python", "py", "python3", "")]
+        bodies = python or [body for _, body in blocks]
+        parsable = [body for body in bodies if _parses(body)]
+        return max(parsable or bodies, key=len).strip()
+
+    # Unterminated or stray fences
+    source = text.replace("```python", "").replace("```", "").strip()
+    if _parses(source):
+        return source
+    lines = source.splitlines()
+    start = next((i for i, line in enumerate(lines) if CODE_START_RE.match(line)), None)
+    if start is None:
+        return source
+    for end in range(len(lines), max(start, len(lines) - 50), -1):
+        chunk = "\n".join(lines[start:end])
+        if _parses(chunk):
+            return chunk.strip()
+    return source
+
+
+def _check_safety(tree: ast.AST, forbidden_modules: FrozenSet[str]):
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                if alias.name.split(".")[0] in forbidden_modules:
+                    raise CandidateError(f"Import of '{alias.name}' is not allowed")
+        elif isinstance(node, ast.ImportFrom):
+            if node.module and node.module.split(".")[0] in forbidden_modules:
+                raise CandidateError(f"Import from '{node.module}' is not allowed")
+        elif isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FORBIDDEN_CALLS:
+            raise CandidateError(f"Call to {node.func.id}() is not allowed")
+        elif isinstance(node, ast.Attribute) and node.attr in FORBIDDEN_ATTRIBUTES:
+            raise CandidateError(f"Access to '{node.attr}' is not allowed")
+        elif isinstance(node, ast.Name) and node.id in ("__builtins__", "__import__"):
+            raise CandidateError(f"Use of '{node.id}' is not allowed")
+
+
+def _top_level_functions(tree: ast.Module) -> List[Tuple[str, ast.arguments, ast.AST]]:
+    """(name, arguments, node) of module-level defs and `name = lambda ...` assignments."""
+    functions = []
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef):
+            functions.append((node.name, node.args, node))
+        elif isinstance(node, ast.Assign) and isinstance(node.value, ast.Lambda) \
+                and len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
+            functions.append((node.targets[0].id, node.value.args, node))
+    return functions
+
+
+def _accepts(args: ast.arguments, arity: int) -> bool:
+    positional = len(args.posonlyargs) + len(args.args)
+    required = positional - len(args.defaults)
+    return required <= arity and (positional >= arity or args.vararg is not None)
+
+
+def _find_entry_point(tree: ast.Module, entry_point: str, arity: int) -> str:
+    """
+    The function the task should call: `entry_point` itself if defined, otherwise among
+    functions accepting `arity` positional arguments, one not called by other functions
+    (helpers are), preferring names that share a word with `entry_point`, then the last defined.
+    """
+    functions = _top_level_functions(tree)
+    names = [name for name, _, _ in functions]
+    if entry_point in names:
+        return entry_point
+
+    matching = [(name, node) for name, args, node in functions if _accepts(args, arity)]
+    if not matching:
+        raise CandidateError(f"No function `{entry_point}` (or any function taking {arity} argument(s)) found")
+
+    def called_by_others(name, own):
+        return any(isinstance(n, ast.Name) and n.id == name
+                   for _, _, other in functions if other is not own for n in ast.walk(other))
+
+    roots = [name for name, node in matching if not called_by_others(name, node)] or [n for n, _ in matching]
+    words = [w[:-1] if w.endswith("s") else w for w in entry_point.lower().split("_") if len(w) >= 4]
+    hinted = [name for name in roots if any(w in name.lower() for w in words)]
+    return (hinted or roots)[-1]
+
+
+@lru_cache(maxsize=512)
+def prepare_candidate(code: str, entry_point: Optional[str] = None, arity: int = 1,
+                      required_functions: Tuple[str, ...] = (),
+                      forbidden_modules: FrozenSet[str] = FORBIDDEN_MODULES) -> Candidate:
+    """
+    Extract, parse, statically check and compile a candidate without running it.
+
+    Raises CandidateError for programs that should never reach an evaluator. Results are
+    memoized, so every stage and re-evaluation of the same text reuses the code object.
+    """
+    source = extract_code(code)
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError) as e:
+        raise CandidateError(f"Invalid Python: {e}")
+    _check_safety(tree, forbidden_modules)
+
+    functions = tuple(name for name, _, _ in _top_level_functions(tree))
+    missing = [name for name in required_functions if name not in functions]
+    if missing:
+        raise CandidateError("Missing " + ", ".join(f"{name}()" for name in missing))
+    entry = _find_entry_point(tree, entry_point, arity) if entry_point else None
+    return Candidate(source=source, compiled=compile(tree, "<candidate>", "exec"),
+                     functions=functions, entry_point=entry)
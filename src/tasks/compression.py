@@ -1,10 +1,35 @@
-from src.tasks.base import AbstractBaseTask
+from src.tasks.base import AbstractBaseTask, EvaluationStage, StageOutput
 from src.tasks.registry import register_task
+from src.tasks.compression_corpus import baselines, corpus_files, default_corpus, measure
 import zlib
 import base64
 
 @register_task(name_override="compression")
 class CompressionTask(AbstractBaseTask):
+    required_functions = ("compress", "decompress")
+
+    def __init__(self, mode: str = "ratio", corpus: str = None, corpus_mb: float = 4, chunk_kb: int = 1024,
+                 time_budget: float = 3.0, ratio_weight: float = 0.5, compress_weight: float = 0.25,
+                 decompress_weight: float = 0.25):
+        """
+        mode: "ratio" scores compression ratio on the small test strings; "benchmark" streams a
+            multi-MB corpus and scores ratio plus compress/decompress MB/s against zlib and lzma
+        corpus: corpus file or directory (default: a synthetic corpus of `corpus_mb` MB under .cache/)
+        time_budget: seconds of candidate time per evaluation; slower candidates are measured on a prefix
+        *_weight: share of each benchmark score in the fitness (speed shares are scaled by the ratio score)
+        """
+        if mode not in ("ratio", "benchmark"):
+            raise ValueError(f"Unknown compression mode: {mode}")
+        self.mode = mode
+        self.chunk_size = int(chunk_kb * 1024)
+        self.time_budget = time_budget
+        self.weights = {"ratio": ratio_weight, "compress_speed": compress_weight, "decompress_speed": decompress_weight}
+        self.timing_sensitive = mode == "benchmark"
+        if mode == "benchmark":
+            self.files = corpus_files(corpus) if corpus else [default_corpus(corpus_mb)]
+            # Measured up front so forked evaluation processes inherit them
+            self.baselines = baselines(self.files, self.chunk_size)
+
     @property
     def name(self) -> str:
         return "Compression"
@@ -29,66 +54,111 @@ RECOMMENDATION: Use standard libraries like `zlib`, `gzip`, or `lzma` for reliab
 Do not implement custom algorithms unless you are sure they are lossless and handle edge cases (like Unicode) correctly.
 """
 
-    def evaluate(self, code: str) -> float:
+    # Test Data
+    test_cases = [
+        "Hello World" * 10,
+        "A" * 1000,
+        "Random string with symbols: !@#$%^&*()_+",
+        "Python is a high-level, general-purpose programming language. " * 5
+    ]
+
+    def stages(self):
+        stages = [
+            self.syntax_stage(),
+            # Cheap correctness: one short round trip must be exact before anything else runs
+            EvaluationStage("roundtrip", self._roundtrip_check, weight=0.0, required=1.0),
+        ]
+        if self.mode == "ratio":
+            return stages + [EvaluationStage("ratio", self._score_ratio, weight=1.0)]
+        return stages + [
+            # The last chunk may start just before the budget runs out
+            EvaluationStage("stream", self._stream_corpus, weight=0.0, timeout=2 * self.time_budget),
+            EvaluationStage("ratio", self._score_corpus_ratio, weight=self.weights["ratio"]),
+            EvaluationStage("compress_speed", self._score_compress_speed, weight=self.weights["compress_speed"]),
+            EvaluationStage("decompress_speed", self._score_decompress_speed,
+                            weight=self.weights["decompress_speed"]),
+        ]
+
+    def evaluate(self, code: str):
+        return self.evaluate_cascade(code)
+
+    def _check_case(self, ctx: dict, text: str) -> float:
+        """Round-trip one text and return its fitness (1 - compression ratio)."""
         try:
-            # Clean Code
-            clean_code = code.replace("```python", "").replace("```", "").strip()
-            namespace = {}
-            exec(clean_code, namespace)
+            compressed = ctx["compress"](text)
+            if not isinstance(compressed, bytes):
+                raise ValueError(f"compress() returned {type(compressed)}, expected bytes")
+                
+            reconstructed = ctx["decompress"](compressed)
+            
+            # Hard Constraint: Correctness
+            if reconstructed != text:
+                # Create a short snippet for feedback
+                snippet = reconstructed[:20] + "..." if len(reconstructed) > 20 else reconstructed
+                expected = text[:20] + "..." if len(text) > 20 else text
+                raise ValueError(f"Decompression mismatch: Expected '{expected}', Got '{snippet}'")
             
-            if "compress" not in namespace or "decompress" not in namespace:
-                return 0.0
+            # Metric: Compression Ratio
+            original_len = len(text.encode('utf-8'))
+            compressed_len = len(compressed)
+            
+            if original_len == 0:
+                return 1.0
                 
-            compress_func = namespace["compress"]
-            decompress_func = namespace["decompress"]
-
-            # Test Data
-            test_cases = [
-                "Hello World" * 10,
-                "A" * 1000,
-                "Random string with symbols: !@#$%^&*()_+",
-                "Python is a high-level, general-purpose programming language. " * 5
-            ]
-
-            total_ratio = 0.0
+            ratio = compressed_len / original_len
+            
+            # Clamp fitness
+            return max(0.0, min(1.0, 1.0 - ratio))
             
-            for text in test_cases:
-                try:
-                    compressed = compress_func(text)
-                    if not isinstance(compressed, bytes):
-                        raise ValueError(f"compress() returned {type(compressed)}, expected bytes")
-                        
-                    reconstructed = decompress_func(compressed)
-                    
-                    # Hard Constraint: Correctness
-                    if reconstructed != text:
-                        # Create a short snippet for feedback
-                        snippet = reconstructed[:20] + "..." if len(reconstructed) > 20 else reconstructed
-                        expected = text[:20] + "..." if len(text) > 20 else text
-                        raise ValueError(f"Decompression mismatch: Expected '{expected}', Got '{snippet}'")
-                    
-                    # Metric: Compression Ratio
-                    original_len = len(text.encode('utf-8'))
-                    compressed_len = len(compressed)
-                    
-                    if original_len == 0:
-                        continue
-                        
-                    ratio = compressed_len / original_len
-                    fitness = 1.0 - ratio
-                    
-                    # Clamp fitness
-                    fitness = max(0.0, min(1.0, fitness))
-                    total_ratio += fitness
-                    
-                except Exception as e:
-                    # Re-raise with context if it's not our ValueError
-                    if isinstance(e, ValueError):
-                        raise e
-                    raise RuntimeError(f"Runtime error during test: {e}")
-
-            return total_ratio / len(test_cases)
-
         except Exception as e:
-            # This allows the engine to capture the error as feedback
-            raise e
+            # Re-raise with context if it's not our ValueError
+            if isinstance(e, ValueError):
+                raise e
+            raise RuntimeError(f"Runtime error during test: {e}")
+
+    def _roundtrip_check(self, ctx: dict) -> StageOutput:
+        namespace = self.load_namespace(ctx)
+        ctx["compress"] = namespace["compress"]
+        ctx["decompress"] = namespace["decompress"]
+        self._check_case(ctx, self.test_cases[2])
+        return 1.0
+
+    def _score_ratio(self, ctx: dict) -> float:
+        total_ratio = sum(self._check_case(ctx, text) for text in self.test_cases)
+        return total_ratio / len(self.test_cases)
+
+    def _stream_corpus(self, ctx: dict) -> StageOutput:
+        ctx["stream"] = measure(ctx["compress"], ctx["decompress"], self.files, self.chunk_size, self.time_budget)
+        # Baselines over the same chunks the candidate got through within its budget
+        ctx["baselines"] = {name: prefixes[ctx["stream"].chunks - 1] for name, prefixes in self.baselines.items()}
+        feedback = f"Corpus: {ctx['stream'].describe()}; " + "; ".join(
+            f"{name}: {stats.describe()}" for name, stats in ctx["baselines"].items()
+        )
+        return 1.0, feedback
+
+    def _score_corpus_ratio(self, ctx: dict) -> float:
+        # Matching the better baseline ratio (usually lzma) earns the full share
+        best = max(stats.savings for stats in ctx["baselines"].values())
+        ctx["ratio_score"] = max(0.0, min(1.0, ctx["stream"].savings / best)) if best > 0 else 0.0
+        return ctx["ratio_score"]
+
+    def _score_compress_speed(self, ctx: dict) -> float:
+        # Relative to zlib, the fast baseline, and scaled by the ratio score: returning the
+        # input unchanged (infinitely fast, no savings) earns nothing
+        return ctx["ratio_score"] * min(1.0, ctx["stream"].compress_mbps / ctx["baselines"]["zlib"].compress_mbps)
+
+    def _score_decompress_speed(self, ctx: dict) -> float:
+        return ctx["ratio_score"] * min(1.0, ctx["stream"].decompress_mbps / ctx["baselines"]["zlib"].decompress_mbps)
+
+    def reference_solutions(self):
+        return [
+            "import zlib\n\n"
+            "def compress(text):\n    return zlib.compress(text.encode('utf-8'), 9)\n\n"
+            "def decompress(data):\n    return zlib.decompress(data).decode('utf-8')\n",
+            "import lzma\n\n"
+            "def compress(text):\n    return lzma.compress(text.encode('utf-8'))\n\n"
+            "def decompress(data):\n    return lzma.decompress(data).decode('utf-8')\n",
+            # Valid but useless: no compression at all
+            "def compress(text):\n    return text.encode('utf-8')\n\n"
+            "def decompress(data):\n    return data.decode('utf-8')\n",
+        ]
@@ -0,0 +1,181 @@
+import lzma
+import mmap
+import random
+import time
+import zlib
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Tuple
+
+DEFAULT_CORPUS_DIR = Path(".cache/compression_corpus")
+
+_WORDS = (
+    "the of and to in is that for it as was with be by on not he this are or his from at which but have an "
+    "they you were her she there been one all we their has would when if so what no more out up into do "
+    "time about can than only other new some could these two may first then any like my now over such our "
+    "data value system function process memory network compression stream buffer entropy token model run"
+).split()
+_IDENTIFIERS = ("index", "count", "buffer", "result", "value", "items", "node", "key", "offset", "total", "size")
+
+
+def _code_snippet(rng: random.Random) -> str:
+    """A small Python function built from a fixed vocabulary of identifiers."""
+    args = rng.sample(_IDENTIFIERS, rng.randint(1, 3))
+    lines = [f"def {'_'.join(rng.sample(_IDENTIFIERS, 2))}({', '.join(args)}):",
+             f'    """{" ".join(rng.choices(_WORDS, k=rng.randint(4, 12))).capitalize()}."""']
+    for _ in range(rng.randint(2, 8)):
+        target, source = rng.choice(_IDENTIFIERS), rng.choice(args)
+        lines.append(rng.choice((
+            f"    {target} = {source} + {rng.randrange(100)}",
+            f"    if {source} > {rng.randrange(10)}:\n        {target} = {source}[{rng.randrange(8)}]",
+            f"    for {target} in range({source}):\n        {rng.choice(args)} += {target}",
+        )))
+    lines.append(f"    return {rng.choice(args)}")
+    return "\n".join(lines) + "\n\n\n"
+
+
+def _synthetic_text(rng: random.Random, size: int) -> str:
+    """
+    Mixed text: prose with a Zipf-like word distribution, CSV/JSON-ish log records and Python
+    code. Everything comes from `rng`, so a seed gives the same corpus on every machine.
+    """
+    weights = [1.0 / (rank + 1) for rank in range(len(_WORDS))]
+    parts, total = [], 0
+    while total < size:
+        kind = rng.random()
+        if kind < 0.5:
+            words = rng.choices(_WORDS, weights, k=rng.randint(40, 200))
+            part = " ".join(words).capitalize() + ".\n\n"
+        elif kind < 0.8:
+            part = "".join(
+                f'{{"ts": {1700000000 + rng.randrange(10 ** 6)}, "level": "{rng.choice(("INFO", "WARN", "DEBUG"))}", '
+                f'"user": {rng.randrange(5000)}, "latency_ms": {rng.random() * 300:.2f}}}\n'
+                for _ in range(rng.randint(5, 40))
+            )
+        else:
+            part = "".join(_code_snippet(rng) for _ in range(rng.randint(1, 4)))
+        parts.append(part)
+        total += len(part)
+    return "".join(parts)[:size]
+
+
+def default_corpus(size_mb: float = 4, seed: int = 0) -> Path:
+    """Path to a deterministic synthetic corpus of `size_mb` MB, written once under .cache/."""
+    # Versioned, so a corpus cached by an older generator is not reused
+    path = DEFAULT_CORPUS_DIR / f"synthetic_v2_{size_mb:g}mb_seed{seed}.txt"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text(_synthetic_text(random.Random(seed), int(size_mb * 1024 * 1024)), encoding="utf-8")
+        tmp.replace(path)
+    return path
+
+
+def corpus_files(path) -> List[Path]:
+    """A corpus file, or every non-empty file in a corpus directory."""
+    path = Path(path)
+    if path.is_dir():
+        return [p for p in sorted(path.rglob("*")) if p.is_file() and p.stat().st_size > 0]
+    if not path.exists():
+        raise FileNotFoundError(f"Corpus not found: {path}")
+    return [path]
+
+
+def iter_chunks(files: List[Path], chunk_size: int) -> Iterator[str]:
+    """
+    Stream the corpus as text chunks of about `chunk_size` bytes via mmap, never holding a
+    whole file in memory. Chunk ends are moved back to UTF-8 character boundaries.
+    """
+    for path in files:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            while start < len(mm):
+                end = min(start + chunk_size, len(mm))
+                while end < len(mm) and end > start + 1 and (mm[end] & 0xC0) == 0x80:
+                    end -= 1
+                yield mm[start:end].decode("utf-8", errors="replace")
+                start = end
+
+
+@dataclass
+class StreamStats:
+    bytes_in: int = 0
+    bytes_out: int = 0
+    compress_seconds: float = 0.0
+    decompress_seconds: float = 0.0
+    chunks: int = 0
+
+    @property
+    def savings(self) -> float:
+        """1 - compressed/original, as scored by the ratio task."""
+        return 1.0 - self.bytes_out / self.bytes_in if self.bytes_in else 0.0
+
+    @property
+    def compress_mbps(self) -> float:
+        return self.bytes_in / 1e6 / self.compress_seconds if self.compress_seconds > 0 else float("inf")
+
+    @property
+    def decompress_mbps(self) -> float:
+        return self.bytes_in / 1e6 / self.decompress_seconds if self.decompress_seconds > 0 else float("inf")
+
+    def describe(self) -> str:
+        return (f"ratio {self.bytes_out / max(1, self.bytes_in):.3f}, compress {self.compress_mbps:.1f} MB/s, "
+                f"decompress {self.decompress_mbps:.1f} MB/s over {self.bytes_in / 1e6:.1f} MB")
+
+
+def measure(compress: Callable[[str], bytes], decompress: Callable[[bytes], str], files: List[Path],
+            chunk_size: int = 1 << 20, time_budget: float = None, prefixes: List[StreamStats] = None) -> StreamStats:
+    """
+    Round-trip every chunk through compress/decompress, timing each direction.
+
+    Stops after `time_budget` seconds (at least one chunk), so a slow candidate is measured
+    on a prefix of the corpus instead of timing out. Raises ValueError on a bad round trip.
+    If `prefixes` is given, the stats after each chunk are appended to it.
+    """
+    stats = StreamStats()
+    for text in iter_chunks(files, chunk_size):
+        start = time.perf_counter()
+        compressed = compress(text)
+        middle = time.perf_counter()
+        restored = decompress(compressed)
+        end = time.perf_counter()
+        if not isinstance(compressed, bytes):
+            raise ValueError(f"compress() returned {type(compressed)}, expected bytes")
+        if restored != text:
+            raise ValueError(f"Decompression mismatch on corpus chunk {stats.chunks}")
+
+        stats.bytes_in += len(text.encode("utf-8"))
+        stats.bytes_out += len(compressed)
+        stats.compress_seconds += middle - start
+        stats.decompress_seconds += end - middle
+        stats.chunks += 1
+        if prefixes is not None:
+            prefixes.append(replace(stats))
+        if time_budget is not None and stats.compress_seconds + stats.decompress_seconds >= time_budget:
+            break
+    return stats
+
+
+BASELINES: Dict[str, Tuple[Callable, Callable]] = {
+    "zlib": (lambda text: zlib.compress(text.encode("utf-8")), lambda data: zlib.decompress(data).decode("utf-8")),
+    "lzma": (lambda text: lzma.compress(text.encode("utf-8")), lambda data: lzma.decompress(data).decode("utf-8")),
+}
+
+# Baselines are measured once per process and corpus, since they only depend on the machine
+_baseline_cache: Dict[tuple, Dict[str, List[StreamStats]]] = {}
+
+
+def baselines(files: List[Path], chunk_size: int = 1 << 20) -> Dict[str, List[StreamStats]]:
+    """
+    zlib and lzma measured on the same corpus and chunking as the candidates: for each,
+    the stats over the first 1, 2, ... chunks, so a candidate measured on a prefix of the
+    corpus is compared on that same prefix.
+    """
+    key = (tuple((str(p), p.stat().st_size, p.stat().st_mtime) for p in files), chunk_size)
+    if key not in _baseline_cache:
+        _baseline_cache[key] = {}
+        for name, (c, d) in BASELINES.items():
+            prefixes = []
+            measure(c, d, files, chunk_size, prefixes=prefixes)
+            _baseline_cache[key][name] = prefixes
+    return _baseline_cache[key]
@@ -1,10 +1,34 @@
-from src.tasks.base import AbstractBaseTask
+from src.tasks.base import AbstractBaseTask, EvaluationStage, StageOutput
 from src.tasks.registry import register_task
+from src.tasks.benchmark import calibrate, speed_score, time_ladder
+from src.core.types import EvaluationResult
 import time
 import math
+import inspect
+
+
+def _reference_primes(n: int) -> list:
+    """Sieve of Eratosthenes, used to calibrate the speed target on this machine."""
+    if n < 3:
+        return []
+    sieve = bytearray([1]) * n
+    sieve[0] = sieve[1] = 0
+    for i in range(2, int(n ** 0.5) + 1):
+        if sieve[i]:
+            sieve[i * i::i] = bytearray(len(range(i * i, n, i)))
+    return [i for i in range(n) if sieve[i]]
+
 
 @register_task(name_override="primes")
 class PrimesTask(AbstractBaseTask):
+    timing_sensitive = True
+    entry_point = "get_primes"
+
+    # Input sizes for the timing ladder; the largest one is scored
+    sizes = (2500, 5000, 10000)
+    # Timing per ladder size stops after this many seconds
+    max_seconds_per_size = 1.0
+
     @property
     def name(self) -> str:
         return "Primes"
@@ -13,60 +37,63 @@ class PrimesTask(AbstractBaseTask):
     def description(self) -> str:
         return "Write a function `get_primes(n: int) -> list[int]` that returns a list of all prime numbers less than n. The function must be EFFICIENT."
 
-    def evaluate(self, code: str) -> float:
+    def stages(self):
+        return [
+            self.syntax_stage(),
+            EvaluationStage("correctness", self._check_small, weight=0.0, required=1.0),
+            # A correct count is worth the 0.1 floor; speed earns the rest
+            EvaluationStage("count", self._check_count, weight=0.1, required=1.0),
+            EvaluationStage("performance", self._measure, weight=0.9,
+                            timeout=len(self.sizes) * self.max_seconds_per_size + 1.0),
+        ]
+
+    def evaluate(self, code: str) -> EvaluationResult:
         """
         Tests correctness and speed.
         """
-        try:
-            # Clean Code
-            clean_code = code.replace("```python", "").replace("```", "").strip()
-            namespace = {}
-            exec(clean_code, namespace)
-            
-            func = None
-            for name, obj in namespace.items():
-                if callable(obj) and "prime" in name.lower():
-                    func = obj
-                    break
-            
-            if not func:
-                # Fallback to finding any function
-                for name, obj in namespace.items():
-                    if callable(obj):
-                        func = obj
-                        break
-            
-            if not func:
-                 raise ValueError("No function found")
+        return self.evaluate_cascade(code)
+
+    def _check_small(self, ctx: dict) -> StageOutput:
+        func = ctx["func"] = self.entry_function(ctx)
+
+        # Correctness Check (small n)
+        reference = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29]
+        if func(30) != reference:
+            return 0.0, "get_primes(30) returned the wrong primes" # Fail if basic correctness is wrong
+        return 1.0
 
-            # Correctness Check (small n)
-            reference = [2, 3, 5, 7, 11, 13, 17, 19, 23, 29]
-            if func(30) != reference:
-                return 0.0 # Fail if basic correctness is wrong
+    def _check_count(self, ctx: dict) -> StageOutput:
+        # Verify result length (there are 1229 primes < 10000)
+        n = self.sizes[-1]
+        if len(ctx["func"](n)) != 1229:
+            return 0.0, f"Wrong number of primes below {n}" # Correct logic but wrong count?
+        return 1.0
 
-            # Performance Check (larger n)
-            start_time = time.perf_counter()
-            result = func(10000)
-            end_time = time.perf_counter()
-            duration = end_time - start_time
-            
-            # Verify result length roughly (there are 1229 primes < 10000)
-            if len(result) != 1229:
-                return 0.1 # Correct logic but wrong count?
+    def _measure(self, ctx: dict) -> StageOutput:
+        # Performance Check: warm-up + repeated trials over a ladder of sizes,
+        # scored by median time against a sieve timed on this machine
+        n = self.sizes[-1]
+        ladder = time_ladder(ctx["func"], lambda size: (size,), self.sizes, warmup=1, repeats=5,
+                             max_seconds=self.max_seconds_per_size)
+        candidate = ladder.stats[-1]
+        baseline = calibrate(("primes", n), _reference_primes, lambda: (n,))
 
-            # Fitness based on speed relative to a baseline
-            # Baseline (Sieve) ~ 0.002s
-            # Slow (Trial division) ~ 0.2s
-            # We want to encourage < 0.01s
-            
-            target_time = 0.002
-            # Score = target / max(actual, target)
-            # If actual <= target, score = 1.0
-            # If actual = 0.02 (10x slower), score = 0.1
-            
-            score = target_time / max(duration, target_time)
-            return max(0.1, min(1.0, score)) # Floor at 0.1 if correct
+        # Score = reference / candidate; 10x slower than the sieve earns 0.1 of the speed share
+        feedback = (
+            f"Correct. Timing at n={n}: {candidate.describe()}; "
+            f"reference sieve: {baseline.describe()}. Ladder: {ladder.describe()}."
+        )
+        return speed_score(candidate, baseline), feedback
 
-        except Exception as e:
-            # print(f"Error: {e}")
-            return 0.0
+    def reference_solutions(self):
+        return [
+            inspect.getsource(_reference_primes).replace("_reference_primes", "get_primes"),
+            "def get_primes(n):\n"
+            "    result = []\n"
+            "    for i in range(2, n):\n"
+            "        if all(i % d for d in range(2, int(i ** 0.5) + 1)):\n"
+            "            result.append(i)\n"
+            "    return result\n",
+            # Flawed: treats 1 as prime
+            "def get_primes(n):\n    return [i for i in range(1, n) if all(i % d for d in range(2, i))]\n",
+        ]
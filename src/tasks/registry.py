@@ -1,8 +1,19 @@
+import importlib
 from typing import Dict, Type, List, Optional
 from src.tasks.base import AbstractBaseTask
 
+# Built-in tasks as name -> "module:Class". A task module is only imported when the task is
+# requested, so listing tasks or starting a worker doesn't pay for every task's imports.
+TASK_MANIFEST: Dict[str, str] = {
+    "compression": "src.tasks.compression:CompressionTask",
+    "primes": "src.tasks.primes:PrimesTask",
+    "sorting": "src.tasks.sorting:SortingTask",
+    "sudoku": "src.tasks.sudoku:SudokuSolverTask",
+}
+
 class TaskRegistry:
     _registry: Dict[str, Type[AbstractBaseTask]] = {}
+    _manifest: Dict[str, str] = dict(TASK_MANIFEST)
 
     @classmethod
     def register(cls, task_cls: Type[AbstractBaseTask]):
@@ -16,25 +27,43 @@ class TaskRegistry:
             name = name_override
             if not name:
                 name = task_cls.__name__.lower().replace("task", "")
-            
+
             cls._registry[name] = task_cls
             return task_cls
         return decorator
 
     @classmethod
-    def get_task(cls, name: str) -> Optional[AbstractBaseTask]:
-        """Get a task instance by name."""
-        task_cls = cls._registry.get(name.lower())
+    def register_lazy(cls, name: str, target: str):
+        """Register a task by "module:Class" without importing it yet."""
+        cls._manifest[name.lower()] = target
+
+    @classmethod
+    def get_task_class(cls, name: str) -> Optional[Type[AbstractBaseTask]]:
+        """The task class for `name`, importing its module from the manifest on first use."""
+        name = name.lower()
+        if name not in cls._registry and name in cls._manifest:
+            module_name, _, class_name = cls._manifest[name].partition(":")
+            module = importlib.import_module(module_name)
+            # Importing normally registers the class via @register_task
+            if name not in cls._registry and class_name:
+                cls._registry[name] = getattr(module, class_name)
+        return cls._registry.get(name)
+
+    @classmethod
+    def get_task(cls, name: str, **options) -> Optional[AbstractBaseTask]:
+        """Get a task instance by name. `options` are passed to the task's constructor."""
+        task_cls = cls.get_task_class(name)
         if task_cls:
-            return task_cls()
+            return task_cls(**options)
         return None
 
     @classmethod
     def list_tasks(cls) -> List[str]:
-        """List all registered task names."""
-        return sorted(list(cls._registry.keys()))
+        """List all registered task names (without importing them)."""
+        return sorted(set(cls._registry) | set(cls._manifest))
 
 # Global instance not strictly needed if using classmethods, but for imports:
 register_task = TaskRegistry.register_task
+register_lazy = TaskRegistry.register_lazy
 get_task = TaskRegistry.get_task
 list_tasks = TaskRegistry.list_tasks
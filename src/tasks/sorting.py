@@ -1,5 +1,9 @@
-from src.tasks.base import AbstractBaseTask
+from src.tasks.base import AbstractBaseTask, EvaluationStage, StageOutput
 from src.tasks.registry import register_task
+from src.tasks.benchmark import calibrate, time_call
+from src.tasks.sorting_inputs import DISTRIBUTIONS, as_list, make_input, matches, sorted_copy
+from src.core.evaluator import TimeoutException, time_limit
+import time
 
 @register_task(name_override="sorting")
 class SortingTask(AbstractBaseTask):
@@ -9,46 +13,138 @@ class SortingTask(AbstractBaseTask):
 
     @property
     def description(self) -> str:
-        return "Sort a list of integers in ascending order"
+        return "Sort a list of integers in ascending order. Name the function `sort_list(items)`"
 
-    def evaluate(self, code: str) -> float:
+    entry_point = "sort_list"
+
+    # Test cases: the first one is the cheap smoke test
+    test_cases = [
+        ([3, 1, 2], [1, 2, 3]),
+        ([5, 4, 3, 2, 1], [1, 2, 3, 4, 5]),
+        ([], []),
+        ([-1, 5, 0], [-1, 0, 5])
+    ]
+
+    def __init__(self, mode: str = "cases", sizes: tuple = (10_000, 100_000, 1_000_000),
+                 distributions: tuple = DISTRIBUTIONS, call_timeout: float = 2.0, time_budget: float = 3.0,
+                 seed: int = 0):
+        """
+        mode: "cases" checks the small test cases; "benchmark" also times large generated inputs
+            against the built-in `sorted`
+        sizes / distributions: benchmark inputs (see src.tasks.sorting_inputs)
+        call_timeout: seconds a candidate may spend on one input
+        time_budget: seconds of candidate time per evaluation; larger sizes are skipped once spent
+        """
+        if mode not in ("cases", "benchmark"):
+            raise ValueError(f"Unknown sorting mode: {mode}")
+        self.mode = mode
+        self.timing_sensitive = mode == "benchmark"
+        self.call_timeout = call_timeout
+        self.time_budget = time_budget
+        self.inputs = []
+        if mode == "benchmark":
+            # (distribution, size, input, expected, baseline seconds), smallest sizes first.
+            # Baselines are timed up front so forked evaluation processes inherit them.
+            for n in sorted(sizes):
+                for distribution in distributions:
+                    values = make_input(distribution, n, seed)
+                    baseline = calibrate(("sorting", distribution, n, seed), sorted, lambda v=values: (as_list(v),),
+                                         warmup=1, repeats=3)
+                    self.inputs.append((distribution, n, values, sorted_copy(values), baseline.median))
+
+    def stages(self):
+        stages = [
+            self.syntax_stage(),
+            EvaluationStage("smoke", self._smoke_test, weight=1, required=1.0),
+            EvaluationStage("cases", self._remaining_cases, weight=len(self.test_cases) - 1),
+        ]
+        if self.mode == "benchmark":
+            # Correct small cases are a 10% floor; speed on large inputs earns the rest
+            stages[-1].required = 1.0
+            stages.append(EvaluationStage("performance", self._measure, weight=9 * len(self.test_cases),
+                                          timeout=self.time_budget + self.call_timeout))
+        return stages
+
+    def evaluate(self, code: str):
         """
         Tests if the code sorts a list correctly.
         """
-        try:
-            # Clean the code string 
-            clean_code = code.replace("```python", "").replace("```", "").strip()
-            
-            # Create a namespace
-            namespace = {}
-            exec(clean_code, namespace)
-            
-            # Find the function
-            func = None
-            for name, obj in namespace.items():
-                if callable(obj):
-                    func = obj
-                    break
-            
-            if not func:
-                raise ValueError("No function found")
-
-            # Test cases
-            test_cases = [
-                ([3, 1, 2], [1, 2, 3]),
-                ([5, 4, 3, 2, 1], [1, 2, 3, 4, 5]),
-                ([], []),
-                ([-1, 5, 0], [-1, 0, 5])
-            ]
-            
-            score = 0
-            for input_list, expected in test_cases:
-                # IMPORTANT: pass a copy so in-place sorts don't mess up next check
-                result = func(input_list.copy())
-                if result == expected:
-                    score += 1
-            
-            return score / len(test_cases)
-            
-        except Exception as e:
-            raise e
+        return self.evaluate_cascade(code)
+
+    def _run_cases(self, func, cases) -> float:
+        score = 0
+        for input_list, expected in cases:
+            # IMPORTANT: pass a copy so in-place sorts don't mess up next check
+            result = func(input_list.copy())
+            if result == expected:
+                score += 1
+        return score / len(cases)
+
+    def _smoke_test(self, ctx: dict) -> float:
+        ctx["func"] = self.entry_function(ctx)
+        return self._run_cases(ctx["func"], self.test_cases[:1])
+
+    def _remaining_cases(self, ctx: dict) -> float:
+        return self._run_cases(ctx["func"], self.test_cases[1:])
+
+    def _measure(self, ctx: dict) -> StageOutput:
+        """
+        Time the candidate on each large input. Each input scores r / (1 + r) with
+        r = sorted time / candidate time: 0.5 for matching `sorted`, approaching (never
+        reaching) 1.0 for faster sorts, 0 for wrong, failed or skipped inputs.
+        """
+        func = ctx["func"]
+        scores, notes = [], []
+        spent = 0.0
+        for distribution, n, values, expected, baseline in self.inputs:
+            if spent >= self.time_budget:
+                scores.append(0.0)
+                notes.append(f"{distribution} n={n}: skipped")
+                continue
+            args = as_list(values)
+            start = time.perf_counter()
+            try:
+                with time_limit(self.call_timeout):
+                    result = func(args)
+            except TimeoutException:
+                result = None
+                notes.append(f"{distribution} n={n}: timed out (>{self.call_timeout}s)")
+            duration = time.perf_counter() - start
+            spent += duration
+            # Cheap inputs get a few more (warm) trials, together under the call limit too;
+            # the first, cold run then only serves as the warm-up
+            if result is not None and duration < 0.05:
+                try:
+                    with time_limit(self.call_timeout):
+                        stats = time_call(func, lambda: (as_list(values),), warmup=0, repeats=5, max_seconds=0.05)
+                    spent += sum(stats.samples)
+                    duration = stats.median
+                except TimeoutException:
+                    result = None
+                    spent += self.call_timeout
+                    notes.append(f"{distribution} n={n}: repeat run timed out (>{self.call_timeout}s)")
+
+            if result is None:
+                scores.append(0.0)
+            elif not matches(result, expected):
+                scores.append(0.0)
+                notes.append(f"{distribution} n={n}: wrong result")
+            else:
+                ratio = baseline / duration if duration > 0 else float("inf")
+                scores.append(ratio / (1 + ratio))
+                notes.append(f"{distribution} n={n}: {duration * 1000:.1f}ms ({ratio:.2f}x sorted)")
+        return sum(scores) / len(scores), "Benchmark: " + ", ".join(notes)
+
+    def reference_solutions(self):
+        return [
+            "def sort_list(items):\n    return sorted(items)\n",
+            "def sort_list(items):\n"
+            "    result = list(items)\n"
+            "    for i in range(len(result)):\n"
+            "        for j in range(len(result) - 1 - i):\n"
+            "            if result[j] > result[j + 1]:\n"
+            "                result[j], result[j + 1] = result[j + 1], result[j]\n"
+            "    return result\n",
+            # Flawed: drops duplicates and negatives
+            "def sort_list(items):\n    return sorted(set(x for x in items if x >= 0))\n",
+        ]
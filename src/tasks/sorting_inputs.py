@@ -0,0 +1,70 @@
+import random
+from array import array
+from typing import Sequence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+DISTRIBUTIONS = ("random", "sorted", "reversed", "few_unique", "nearly_sorted")
+
+
+def make_input(distribution: str, n: int, seed: int = 0):
+    """
+    A benchmark input of `n` integers, as a NumPy int64 array (or array('q') without NumPy).
+
+    Inputs are kept in compact form and turned into a fresh list (`as_list`) for each call.
+    """
+    if distribution not in DISTRIBUTIONS:
+        raise ValueError(f"Unknown distribution: {distribution}")
+    if np is not None:
+        rng = np.random.default_rng([seed, n, DISTRIBUTIONS.index(distribution)])
+        if distribution == "few_unique":
+            return rng.integers(0, 10, n, dtype=np.int64)
+        values = rng.integers(-10 ** 9, 10 ** 9, n, dtype=np.int64)
+        if distribution == "random":
+            return values
+        values.sort()
+        if distribution == "reversed":
+            return values[::-1].copy()
+        if distribution == "nearly_sorted":
+            # Swap 1% of positions
+            swaps = rng.integers(0, n, (max(1, n // 100), 2))
+            values[swaps[:, 0]], values[swaps[:, 1]] = values[swaps[:, 1]], values[swaps[:, 0]]
+        return values
+
+    rng = random.Random(f"{seed}:{n}:{distribution}")
+    if distribution == "few_unique":
+        return array("q", (rng.randrange(10) for _ in range(n)))
+    values = [rng.randrange(-10 ** 9, 10 ** 9) for _ in range(n)]
+    if distribution != "random":
+        values.sort(reverse=distribution == "reversed")
+    if distribution == "nearly_sorted":
+        for _ in range(max(1, n // 100)):
+            i, j = rng.randrange(n), rng.randrange(n)
+            values[i], values[j] = values[j], values[i]
+    return array("q", values)
+
+
+def as_list(values) -> list:
+    return values.tolist()
+
+
+def sorted_copy(values):
+    """The expected output, in the same compact form as the input."""
+    if np is not None:
+        return np.sort(values, kind="stable")
+    return array("q", sorted(values))
+
+
+def matches(result, expected) -> bool:
+    """Whether a candidate's result equals the expected sorted values (vectorized with NumPy)."""
+    if not isinstance(result, (list, tuple)) or len(result) != len(expected):
+        return False
+    if np is not None:
+        try:
+            return bool(np.array_equal(np.asarray(result, dtype=np.int64), expected))
+        except (TypeError, ValueError, OverflowError):
+            return False
+    return list(result) == expected.tolist()
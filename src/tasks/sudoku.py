@@ -1,8 +1,16 @@
-from src.tasks.base import AbstractBaseTask
+from src.tasks.base import AbstractBaseTask, EvaluationStage, StageOutput
 from src.tasks.registry import register_task
+from src.tasks.benchmark import calibrate
+from src.tasks.sudoku_corpus import build_corpus, check_boards, solve, to_board
+from src.core.evaluator import TimeoutException, time_limit
+import copy
+import time
 
 @register_task(name_override="sudoku")
 class SudokuSolverTask(AbstractBaseTask):
+    timing_sensitive = True
+    entry_point = "solve_sudoku"
+
     @property
     def name(self) -> str:
         return "SudokuSolver"
@@ -11,99 +19,146 @@ class SudokuSolverTask(AbstractBaseTask):
     def description(self) -> str:
         return "Write a function `solve_sudoku(board)` that solves a 9x9 Sudoku grid. The board is a list of lists of integers, where 0 represents an empty cell. The function should return the solved board."
 
-    def evaluate(self, code: str) -> float:
+    # Simple Easy Puzzle
+    # 0 represents empty
+    input_board = [
+        [5, 3, 0, 0, 7, 0, 0, 0, 0],
+        [6, 0, 0, 1, 9, 5, 0, 0, 0],
+        [0, 9, 8, 0, 0, 0, 0, 6, 0],
+        [8, 0, 0, 0, 6, 0, 0, 0, 3],
+        [4, 0, 0, 8, 0, 3, 0, 0, 1],
+        [7, 0, 0, 0, 2, 0, 0, 0, 6],
+        [0, 6, 0, 0, 0, 0, 2, 8, 0],
+        [0, 0, 0, 4, 1, 9, 0, 0, 5],
+        [0, 0, 0, 0, 8, 0, 0, 7, 9]
+    ]
+
+    def __init__(self, extra_puzzles: int = 0, puzzle_timeout: float = 1.0, time_budget: float = 3.0, seed: int = 0):
+        """
+        extra_puzzles: generated puzzles added per grade (easy/medium/hard) to the bundled corpus
+        puzzle_timeout: seconds a candidate may spend on one puzzle
+        time_budget: seconds for the whole corpus; puzzles not reached count as unsolved
+        """
+        self.corpus = build_corpus(extra_puzzles, seed)
+        self.puzzle_timeout = puzzle_timeout
+        self.time_budget = time_budget
+
+    def stages(self):
+        return [
+            self.syntax_stage(),
+            # Running without crashing is worth 0.1 (the old score for a wrongly formatted result)
+            EvaluationStage("solve", self._solve, weight=0.1, required=1.0),
+            EvaluationStage("constraints", self._check_constraints, weight=0.2),
+            # Correctness over the graded corpus, then speed relative to the reference solver
+            EvaluationStage("corpus", self._solve_corpus, weight=0.5,
+                            timeout=self.time_budget + self.puzzle_timeout),
+            EvaluationStage("speed", self._score_speed, weight=0.2),
+        ]
+
+    def evaluate(self, code: str):
         """
-        Tests if the code solves a simple Sudoku puzzle.
+        Tests if the code solves a simple Sudoku puzzle, then the graded corpus.
         """
-        try:
-            clean_code = code.replace("```python", "").replace("```", "").strip()
-            namespace = {}
-            exec(clean_code, namespace)
-            
-            func = None
-            for name, obj in namespace.items():
-                if callable(obj) and "solve" in name.lower():
-                    func = obj
-                    break
-            
-            if not func:
-                # Try finding any function
-                for name, obj in namespace.items():
-                    if callable(obj):
-                        func = obj
-                        break
-            
-            if not func:
-                raise ValueError("No function found")
-
-            # Simple Easy Puzzle
-            # 0 represents empty
-            input_board = [
-                [5, 3, 0, 0, 7, 0, 0, 0, 0],
-                [6, 0, 0, 1, 9, 5, 0, 0, 0],
-                [0, 9, 8, 0, 0, 0, 0, 6, 0],
-                [8, 0, 0, 0, 6, 0, 0, 0, 3],
-                [4, 0, 0, 8, 0, 3, 0, 0, 1],
-                [7, 0, 0, 0, 2, 0, 0, 0, 6],
-                [0, 6, 0, 0, 0, 0, 2, 8, 0],
-                [0, 0, 0, 4, 1, 9, 0, 0, 5],
-                [0, 0, 0, 0, 8, 0, 0, 7, 9]
-            ]
-            
-            # Expected solution not strictly needed if we validate rules, 
-            # but for simplicity let's just check validity of the result.
-            
+        return self.evaluate_cascade(code)
+
+    def _solve(self, ctx: dict) -> StageOutput:
+        ctx["func"] = self.entry_function(ctx)
+
+        # Pass a deep copy
+        ctx["result"] = ctx["func"](copy.deepcopy(self.input_board))
+        return 1.0
+
+    def _check_constraints(self, ctx: dict) -> StageOutput:
+        result = ctx["result"]
+        if not isinstance(result, list) or len(result) != 9:
+            return 0.0, "Wrong format: expected a list of 9 rows"
+
+        # Expected solution not strictly needed if we validate rules,
+        # but for simplicity let's just check validity of the result.
+        puzzle = "".join(str(v) for row in self.input_board for v in row)
+        return check_boards([puzzle], [result])[0]
+
+    def _solve_corpus(self, ctx: dict) -> StageOutput:
+        func = ctx["func"]
+        boards, times, timeouts = [], [], 0
+        spent = 0.0
+        for grade, puzzle in self.corpus:
+            if spent >= self.time_budget:
+                boards.append(None)
+                times.append(None)
+                continue
+            start = time.perf_counter()
             try:
-                # Pass a deep copy
-                import copy
-                result = func(copy.deepcopy(input_board))
-            except Exception as e:
-                # Execution error
-                raise e
-
-            if not isinstance(result, list) or len(result) != 9:
-                return 0.1 # Wrong format
-
-            return self._calculate_fitness(result)
-            
-        except Exception as e:
-            # print(f"Eval Error: {e}")
-            raise e
-
-    def _calculate_fitness(self, board) -> float:
-        """Check how many constraints are satisfied."""
-        score = 0
-        total_checks = 0
-        
-        # Check rows
-        for row in board:
-            if self._is_valid_unit(row):
-                score += 1
-            total_checks += 1
-            
-        # Check cols
-        for col in range(9):
-            column = [board[row][col] for row in range(9)]
-            if self._is_valid_unit(column):
-                score += 1
-            total_checks += 1
-            
-        # Check 3x3 squares
-        for i in range(0, 9, 3):
-            for j in range(0, 9, 3):
-                square = []
-                for x in range(3):
-                    for y in range(3):
-                        square.append(board[i+x][j+y])
-                if self._is_valid_unit(square):
-                    score += 1
-                total_checks += 1
-        
-        return score / total_checks
-
-    def _is_valid_unit(self, unit) -> bool:
-        # Must be 1-9, no duplicates, no zeros
-        unit = [x for x in unit if isinstance(x, int)]
-        if len(unit) != 9: return False
-        if 0 in unit: return False
-        return len(set(unit)) == 9
+                with time_limit(self.puzzle_timeout):
+                    boards.append(func(to_board(puzzle)))
+            except TimeoutException:
+                boards.append(None)
+                timeouts += 1
+            except Exception:
+                boards.append(None)
+            times.append(time.perf_counter() - start)
+            spent += times[-1]
+
+        # Validate every returned board in one batch
+        ctx["scores"] = check_boards([puzzle for _, puzzle in self.corpus], boards)
+        ctx["times"] = times
+
+        per_grade = {}
+        for (grade, _), score, duration in zip(self.corpus, ctx["scores"], times):
+            solved, total, seconds = per_grade.get(grade, (0, 0, 0.0))
+            per_grade[grade] = (solved + (score == 1.0), total + 1, seconds + (duration or 0.0))
+        feedback = "Corpus: " + ", ".join(
+            f"{grade} {solved}/{total} ({seconds * 1000:.1f}ms)" for grade, (solved, total, seconds) in per_grade.items()
+        )
+        if timeouts:
+            feedback += f"; {timeouts} puzzle(s) exceeded {self.puzzle_timeout}s"
+        unreached = sum(t is None for t in times)
+        if unreached:
+            feedback += f"; {unreached} puzzle(s) skipped after the {self.time_budget}s budget"
+        return sum(ctx["scores"]) / len(self.corpus), feedback
+
+    def _score_speed(self, ctx: dict) -> StageOutput:
+        # Compare total time on the solved puzzles against the reference solver on the same ones
+        solved = [i for i, score in enumerate(ctx["scores"]) if score == 1.0]
+        if not solved:
+            return 0.0
+        candidate = sum(ctx["times"][i] for i in solved)
+        reference = sum(calibrate(("sudoku", self.corpus[i][1]), solve, lambda i=i: (self.corpus[i][1],)).median
+                        for i in solved)
+        ratio = min(1.0, reference / candidate) if candidate > 0 else 1.0
+        # Fast on a few easy puzzles should not beat solving the whole corpus
+        score = ratio * len(solved) / len(self.corpus)
+        return score, f"{candidate * 1000:.1f}ms on {len(solved)} solved puzzles (reference solver {reference * 1000:.1f}ms)"
+
+    def reference_solutions(self):
+        return [
+            "def solve_sudoku(board):\n"
+            "    def candidates(r, c):\n"
+            "        used = set(board[r]) | {board[i][c] for i in range(9)}\n"
+            "        br, bc = 3 * (r // 3), 3 * (c // 3)\n"
+            "        used |= {board[i][j] for i in range(br, br + 3) for j in range(bc, bc + 3)}\n"
+            "        return [v for v in range(1, 10) if v not in used]\n"
+            "\n"
+            "    def search():\n"
+            "        best = None\n"
+            "        for r in range(9):\n"
+            "            for c in range(9):\n"
+            "                if board[r][c] == 0:\n"
+            "                    options = candidates(r, c)\n"
+            "                    if best is None or len(options) < len(best[2]):\n"
+            "                        best = (r, c, options)\n"
+            "        if best is None:\n"
+            "            return True\n"
+            "        r, c, options = best\n"
+            "        for v in options:\n"
+            "            board[r][c] = v\n"
+            "            if search():\n"
+            "                return True\n"
+            "        board[r][c] = 0\n"
+            "        return False\n"
+            "\n"
+            "    search()\n"
+            "    return board\n",
+            # Flawed: returns the puzzle unsolved
+            "def solve_sudoku(board):\n    return board\n",
+        ]
@@ -0,0 +1,205 @@
+import random
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Puzzles are 81-character strings, row by row, "0" for an empty cell.
+# Every bundled puzzle has exactly one solution (checked with `count_solutions`).
+PUZZLES: Dict[str, List[str]] = {
+    "easy": [
+        "530070000600195000098000060800060003400803001700020006060000280000419005000080079",
+        "000004256297000380000020019356071000079250000810930400520010900701009500904000000",
+        "050010700002000086003002900070290405564087009020430670000823060230501000040609000",
+        "945000276000402903000000018020057000000001865650000027062100000030004081710306590",
+        "006005000801700005090800036000409008129007054040060000387041562000620000610508009",
+    ],
+    "medium": [
+        "560203100020800309000000050090460008070500000856000001080039074000004800000750020",
+        "020703900300520000007000503084900006000060040032001000216000370903000000050134000",
+        "000104900021900486740008000200000000000039267000056008400600000060000004070085021",
+        "025140780043000050900000001006007010004001020500400000000970200308200006059008007",
+    ],
+    "hard": [
+        "000803900000100008091600005002007009010000450040900002500060070000000000008050201",
+        "600050021907000830000000000700500000030400092006002000390000000000028019060010005",
+        "000706940500040700700300006000905008076100003002000009040000500000010060003000004",
+        "030200700050060010000075090000896050000000000900520003008000900700000600306040008",
+        "800000000003600000070090200050007000000045700000100030001000068008500010090000400",
+    ],
+    "17-clue": [
+        "000000010400000000020000000000050407008000300001090000300400200050100000000806000",
+        "000000012000035000000600070700000300000400800100000000000120000080000040050000600",
+        "000000012003600000000007000410020000000500300700000600280000040000300500000000000",
+    ],
+}
+
+# Clues kept by `generate_puzzle` for each generated grade
+GRADE_CLUES = {"easy": 36, "medium": 30, "hard": 25}
+
+_BOX = [(r // 3) * 3 + c // 3 for r in range(9) for c in range(9)]
+_ALL = 0x3FE  # bits 1..9
+
+
+def _search(grid: List[int], limit: int, rng: Optional[random.Random] = None) -> List[List[int]]:
+    """Depth-first search with bitmask candidates, always branching on the most constrained cell."""
+    rows, cols, boxes = [0] * 9, [0] * 9, [0] * 9
+    empties = []
+    for i, v in enumerate(grid):
+        if v:
+            bit = 1 << v
+            r, c, b = i // 9, i % 9, _BOX[i]
+            if (rows[r] | cols[c] | boxes[b]) & bit:
+                return []  # contradicting givens
+            rows[r] |= bit
+            cols[c] |= bit
+            boxes[b] |= bit
+        else:
+            empties.append(i)
+    solutions = []
+
+    def search():
+        best, best_mask, best_count = -1, 0, 10
+        for i in empties:
+            if grid[i]:
+                continue
+            mask = _ALL & ~(rows[i // 9] | cols[i % 9] | boxes[_BOX[i]])
+            count = bin(mask).count("1")
+            if count < best_count:
+                best, best_mask, best_count = i, mask, count
+                if count <= 1:
+                    break
+        if best < 0:
+            solutions.append(list(grid))
+            return len(solutions) >= limit
+        if best_count == 0:
+            return False
+        values = [v for v in range(1, 10) if best_mask >> v & 1]
+        if rng:
+            rng.shuffle(values)
+        r, c, b = best // 9, best % 9, _BOX[best]
+        for v in values:
+            bit = 1 << v
+            grid[best] = v
+            rows[r] |= bit
+            cols[c] |= bit
+            boxes[b] |= bit
+            done = search()
+            rows[r] ^= bit
+            cols[c] ^= bit
+            boxes[b] ^= bit
+            grid[best] = 0
+            if done:
+                return True
+        return False
+
+    search()
+    return solutions
+
+
+def to_grid(puzzle: str) -> List[int]:
+    return [int(ch) for ch in puzzle]
+
+
+def to_board(puzzle: str) -> List[List[int]]:
+    """The list-of-rows form candidates receive."""
+    cells = to_grid(puzzle)
+    return [cells[r * 9:(r + 1) * 9] for r in range(9)]
+
+
+def solve(puzzle: str) -> Optional[str]:
+    """Reference solver: the solution as an 81-character string, or None if unsolvable."""
+    solutions = _search(to_grid(puzzle), limit=1)
+    return "".join(map(str, solutions[0])) if solutions else None
+
+
+def count_solutions(puzzle: str, limit: int = 2) -> int:
+    """Number of solutions, counting at most `limit` (2 is enough to check uniqueness)."""
+    return len(_search(to_grid(puzzle), limit=limit))
+
+
+def generate_puzzle(rng: random.Random, clues: int) -> str:
+    """
+    A random puzzle with a unique solution: fill a grid randomly, then blank cells in random
+    order as long as the solution stays unique. May keep more than `clues` clues when no
+    further cell can be removed.
+    """
+    grid = _search([0] * 81, limit=1, rng=rng)[0]
+    cells = list(range(81))
+    rng.shuffle(cells)
+    filled = 81
+    for i in cells:
+        if filled <= clues:
+            break
+        value, grid[i] = grid[i], 0
+        if len(_search(list(grid), limit=2)) == 1:
+            filled -= 1
+        else:
+            grid[i] = value
+    return "".join(map(str, grid))
+
+
+@lru_cache(maxsize=8)
+def build_corpus(extra_per_grade: int = 0, seed: int = 0) -> Tuple[Tuple[str, str], ...]:
+    """(grade, puzzle) pairs: the bundled puzzles plus `extra_per_grade` generated ones per generated grade."""
+    corpus = [(grade, puzzle) for grade, puzzles in PUZZLES.items() for puzzle in puzzles]
+    rng = random.Random(seed)
+    for grade, clues in GRADE_CLUES.items():
+        corpus += [(grade, generate_puzzle(rng, clues)) for _ in range(extra_per_grade)]
+    return tuple(corpus)
+
+
+def _is_board(board) -> bool:
+    return isinstance(board, list) and len(board) == 9 and all(
+        isinstance(row, list) and len(row) == 9 and all(isinstance(v, int) and 0 <= v <= 9 for v in row)
+        for row in board
+    )
+
+
+def check_boards(puzzles: Sequence[str], boards: Sequence) -> List[float]:
+    """
+    Score each returned board: the fraction of its 27 units (rows, columns, boxes) holding
+    1-9 exactly once, or 0.0 if it is malformed or changes a given. Vectorized with NumPy
+    when available, so checking thousands of boards stays cheap.
+    """
+    scores = [0.0] * len(boards)
+    if np is not None:
+        # Fast path: every board is a well-formed 9x9 grid of ints
+        try:
+            grids = np.array(boards)
+        except ValueError:  # ragged
+            grids = None
+        if grids is not None and grids.shape == (len(boards), 9, 9) and grids.dtype.kind == "i":
+            valid = list(range(len(boards)))
+        else:
+            valid = [i for i, board in enumerate(boards) if _is_board(board)]
+            grids = np.array([boards[i] for i in valid], dtype=np.int64).reshape(-1, 9, 9)
+        if not valid:
+            return scores
+        givens = (np.frombuffer("".join(puzzles[i] for i in valid).encode(), dtype=np.uint8) - ord("0"))
+        givens = givens.reshape(-1, 9, 9)
+        kept = ((grids == givens) | (givens == 0)).all(axis=(1, 2))
+        boxes = grids.reshape(-1, 3, 3, 3, 3).transpose(0, 1, 3, 2, 4).reshape(-1, 9, 9)
+        digits = np.arange(1, 10)
+        units = 0
+        for view in (grids, grids.transpose(0, 2, 1), boxes):
+            units = units + (np.sort(view, axis=2) == digits).all(axis=2).sum(axis=1)
+        for i, score in zip(valid, np.where(kept, units / 27.0, 0.0).tolist()):
+            scores[i] = score
+        return scores
+
+    valid = [i for i, board in enumerate(boards) if _is_board(board)]
+    digits = list(range(1, 10))
+    for i in valid:
+        board, givens = boards[i], to_grid(puzzles[i])
+        if any(g and board[k // 9][k % 9] != g for k, g in enumerate(givens)):
+            continue
+        units = [row for row in board]
+        units += [[board[r][c] for r in range(9)] for c in range(9)]
+        units += [[board[br + r][bc + c] for r in range(3) for c in range(3)]
+                  for br in range(0, 9, 3) for bc in range(0, 9, 3)]
+        scores[i] = sum(sorted(unit) == digits for unit in units) / 27.0
+    return scores
@@ -0,0 +1,103 @@
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List
+from src.core import engine as engine_module
+from src.core.engine import EvolutionEngine
+from src.core.evaluator import create_evaluator
+from src.core.mock_llm import MockLLMProvider
+from src.tasks.registry import get_task
+
+# Startup is measured from here, so `main` and `src` resolve wherever the command is run from
+REPO_ROOT = Path(__file__).resolve().parent.parent.parent
+
+# Modules timed by `measure_startup`: the CLI itself, the engine, and what it should import lazily
+STARTUP_MODULES = ("main", "src.core.engine", "src.core.llm", "src.tasks.sorting", "src.tasks.sudoku",
+                   "src.tasks.primes", "src.tasks.compression", "litellm", "tensorboardX")
+
+
+@dataclass
+class BenchmarkResult:
+    task: str
+    wall: float
+    generate: float
+    evaluate: float
+    llm_calls: int
+    evaluations: int
+    best_fitness: float
+
+    @property
+    def overhead(self) -> float:
+        """Wall time not spent in generation or evaluation (selection, caching, bookkeeping)."""
+        return max(0.0, self.wall - self.generate - self.evaluate)
+
+
+def benchmark_task(task_name: str, generations: int = 3, population: int = 8, latency: float = 0.0,
+                   tokens_per_second: float = None, concurrency: int = 4, evaluator: str = "inline",
+                   eval_workers: int = None, seed: int = 0) -> BenchmarkResult:
+    """Run one task end-to-end against the offline mock LLM and time each phase."""
+    task = get_task(task_name)
+    if task is None:
+        raise ValueError(f"Unknown task: {task_name}")
+
+    llm = MockLLMProvider(corpus=task.reference_solutions(), latency=latency,
+                          tokens_per_second=tokens_per_second, seed=seed)
+    engine = EvolutionEngine(llm=llm, task=task, population_size=population, concurrency=concurrency,
+                             evaluator=create_evaluator(evaluator, workers=eval_workers))
+
+    quiet = engine_module.console.quiet
+    engine_module.console.quiet = True
+    try:
+        start = time.perf_counter()
+        best = engine.run(generations=generations)
+        wall = time.perf_counter() - start
+    finally:
+        engine_module.console.quiet = quiet
+
+    return BenchmarkResult(
+        task=task_name,
+        wall=wall,
+        generate=engine.phase_times["generate"],
+        evaluate=engine.phase_times["evaluate"],
+        llm_calls=llm.calls,
+        evaluations=engine.fitness_cache.misses if engine.fitness_cache else 0,
+        best_fitness=best.fitness if best else 0.0
+    )
+
+
+def run_benchmarks(task_names: List[str], **options) -> List[BenchmarkResult]:
+    return [benchmark_task(name, **options) for name in task_names]
+
+
+@dataclass
+class StartupResult:
+    name: str
+    seconds: float  # median over repeats
+
+
+def _time_process(args: List[str]) -> float:
+    start = time.perf_counter()
+    subprocess.run(args, check=True, capture_output=True, cwd=REPO_ROOT)
+    return time.perf_counter() - start
+
+
+def measure_startup(modules=STARTUP_MODULES, repeats: int = 5) -> List[StartupResult]:
+    """
+    Import time of each module in a fresh interpreter (median of `repeats`), plus the wall time
+    of a whole `main.py list-tasks` invocation.
+    """
+    results = []
+    for module in modules:
+        code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+        samples = [
+            float(subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True,
+                                 cwd=REPO_ROOT).stdout)
+            for _ in range(repeats)
+        ]
+        results.append(StartupResult(f"import {module}", statistics.median(samples)))
+    samples = [_time_process([sys.executable, str(REPO_ROOT / "main.py"), "list-tasks"]) for _ in range(repeats)]
+    results.append(StartupResult("main.py list-tasks", statistics.median(samples)))
+    return results
@@ -0,0 +1,117 @@
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Sequence
+from src.core.cache import canonical_hash
+from src.core.types import Individual
+
+DEFAULT_RESULTS_DB = "results/results.sqlite"
+
+
+@dataclass
+class StoredResult:
+    task: str
+    model: str
+    fitness: float
+    code: str
+    feedback: str
+    run_dir: str
+    created: float
+    task_options: dict
+
+
+class ResultsDB:
+    """
+    Programs from finished runs, shared across runs: the best individual and the final
+    population of each run, indexed by task, model and date for queries and warm starts.
+    """
+
+    def __init__(self, path: str = DEFAULT_RESULTS_DB):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS results (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                run_dir TEXT NOT NULL,
+                task TEXT NOT NULL,
+                task_options TEXT NOT NULL,
+                model TEXT,
+                fitness REAL NOT NULL,
+                code TEXT NOT NULL,
+                code_hash TEXT NOT NULL,
+                feedback TEXT,
+                runtime REAL,
+                generation INTEGER,
+                is_best INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_results_task_fitness ON results(task, fitness DESC);
+            CREATE INDEX IF NOT EXISTS idx_results_model ON results(model, task);
+            CREATE INDEX IF NOT EXISTS idx_results_created ON results(created);
+            CREATE INDEX IF NOT EXISTS idx_results_run_dir ON results(run_dir);
+        """)
+        self._conn.commit()
+
+    def record(self, run_dir: str, task: str, model: str, best: Individual,
+               population: Sequence[Individual] = (), task_options: dict = None):
+        """
+        Store a run's best individual and the distinct programs of its final population,
+        replacing what was stored for the same run before (e.g. when a run is resumed).
+        """
+        now = time.time()
+        options = json.dumps(task_options or {}, sort_keys=True)
+        seen = set()
+        rows = []
+        for ind in [best, *sorted(population, key=lambda x: x.fitness, reverse=True)]:
+            code_hash = canonical_hash(ind.code)
+            if code_hash in seen:
+                continue
+            seen.add(code_hash)
+            rows.append((str(run_dir), task.lower(), options, model, ind.fitness, ind.code, code_hash,
+                         ind.feedback, ind.runtime, ind.generation, int(ind is best), now))
+        with self._lock:
+            self._conn.execute("DELETE FROM results WHERE run_dir = ?", (str(run_dir),))
+            self._conn.executemany(
+                "INSERT INTO results (run_dir, task, task_options, model, fitness, code, code_hash, feedback, "
+                "runtime, generation, is_best, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+
+    def top(self, task: str = None, model: str = None, since: float = None, until: float = None,
+            k: int = 10, best_only: bool = False, task_options: dict = None) -> List[StoredResult]:
+        """
+        The `k` fittest distinct programs matching the filters (timestamps in epoch seconds).
+        Fitness is only comparable between runs with the same `task_options` (e.g. a
+        sorting benchmark vs. test cases), so pass them unless the results are just listed.
+        """
+        options = json.dumps(task_options, sort_keys=True) if task_options is not None else None
+        clauses, params = [], []
+        for clause, value in (("task = ?", task.lower() if task else None), ("model = ?", model),
+                              ("created >= ?", since), ("created < ?", until), ("task_options = ?", options)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        if best_only:
+            clauses.append("is_best = 1")
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        # SQLite returns the other columns of the MAX(fitness) row of each group
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT task, model, MAX(fitness), code, feedback, run_dir, created, task_options FROM results "
+                f"{where} GROUP BY task, task_options, code_hash ORDER BY MAX(fitness) DESC, created DESC LIMIT ?",
+                (*params, k)
+            ).fetchall()
+        return [StoredResult(task=r[0], model=r[1], fitness=r[2], code=r[3], feedback=r[4] or "", run_dir=r[5],
+                             created=r[6], task_options=json.loads(r[7])) for r in rows]
+
+    def warm_start(self, task: str, k: int, task_options: dict = None) -> List[Individual]:
+        """Unevaluated individuals for the `k` best stored programs of `task` run with the same options."""
+        return [Individual(code=r.code) for r in self.top(task=task, k=k, task_options=task_options or {})]
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,94 @@
+import os
+import json
+import time
+import threading
+from dataclasses import asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from src.core.types import Individual
+
+
+class RunLog:
+    """
+    Streaming record of a run, used to resume it after a crash or Ctrl-C.
+
+    - `config.json`: the options the run was started with.
+    - `individuals.jsonl`: one line per event, appended as it happens:
+      "generated" when the LLM returns a program, "evaluated" when it is scored.
+    - `checkpoint.json`: the population about to be evaluated and its generation,
+      rewritten atomically after seeding and after each mutation round.
+    """
+
+    def __init__(self, run_dir):
+        self.run_dir = Path(run_dir)
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        self.events_path = self.run_dir / "individuals.jsonl"
+        self.checkpoint_path = self.run_dir / "checkpoint.json"
+        self.config_path = self.run_dir / "config.json"
+        self._lock = threading.Lock()
+
+    def _append(self, event: dict):
+        event["time"] = time.time()
+        with self._lock, open(self.events_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event) + "\n")
+            f.flush()
+
+    def log_generated(self, ind: Individual):
+        self._append({"event": "generated", **asdict(ind)})
+
+    def log_evaluated(self, ind: Individual):
+        self._append({"event": "evaluated", "id": ind.id, "fitness": ind.fitness, "feedback": ind.feedback,
+                      "runtime": ind.runtime, "generation": ind.generation})
+
+    def _write_json(self, path: Path, data: dict):
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def save_config(self, config: dict):
+        self._write_json(self.config_path, config)
+
+    def load_config(self) -> dict:
+        with open(self.config_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def checkpoint(self, generation: int, population: List[Individual]):
+        self._write_json(self.checkpoint_path, {
+            "generation": generation,
+            "population": [asdict(ind) for ind in population],
+            "time": time.time()
+        })
+
+    def load_checkpoint(self) -> Optional[dict]:
+        if not self.checkpoint_path.exists():
+            return None
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            return json.load(f)
+
+    def load_events(self) -> List[dict]:
+        if not self.events_path.exists():
+            return []
+        events = []
+        with open(self.events_path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    events.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A line cut short by a crash
+                    continue
+        return events
+
+    def load_individuals(self) -> Tuple[Dict[str, Individual], Set[str]]:
+        """Every logged individual by id (with its latest evaluation applied), and the ids that were evaluated."""
+        individuals: Dict[str, Individual] = {}
+        evaluated = set()
+        for event in self.load_events():
+            if event.get("event") == "generated":
+                fields = {k: v for k, v in event.items() if k not in ("event", "time")}
+                individuals[event["id"]] = Individual(**fields)
+            elif event.get("event") == "evaluated" and event["id"] in individuals:
+                ind = individuals[event["id"]]
+                ind.fitness, ind.feedback, ind.runtime = event["fitness"], event["feedback"], event["runtime"]
+                evaluated.add(ind.id)
+        return individuals, evaluated